@@ -0,0 +1,214 @@
+"""
+Local stand-in for a Netbox api, serving synthetic objects
+
+Objects are generated from their id when requested, so the memory used by
+the server does not depend on the size of the dataset.
+"""
+
+import json
+import re
+import threading
+import time
+import urllib.parse
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeNetbox():
+    """
+    :param nb_devices: number of `dcim/devices` objects
+    :param nb_sites: number of `dcim/sites` objects, referenced by devices
+    :param latency: number of seconds waited before each answer
+    :param max_limit: maximum number of objects per page
+    """
+
+    def __init__(self, nb_devices=10000, nb_sites=100, latency=0,
+                 max_limit=1000):
+        self.counts = {"dcim/devices": nb_devices, "dcim/sites": nb_sites}
+        self.latency = latency
+        self.max_limit = max_limit
+        self.nb_requests = 0
+
+        self._next_id = nb_devices + 1
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self._server.daemon_threads = True
+        self._server.fake_netbox = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return "http://{}:{}/api".format(host, port)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def build_object(self, model_route, i):
+        url = "{}/{}/{}/".format(self.url, model_route, i)
+        if model_route == "dcim/sites":
+            return {
+                "id": i, "url": url, "name": "site{}".format(i),
+                "slug": "site{}".format(i),
+                "status": {"value": "active", "label": "Active"},
+                "tags": [], "custom_fields": {},
+                "created": "2020-01-01",
+                "last_updated": "2020-01-01T00:00:00Z",
+            }
+
+        site_id = i % self.counts["dcim/sites"] + 1
+        return {
+            "id": i, "url": url, "name": "device{}".format(i),
+            "serial": "SN{:010d}".format(i),
+            "status": {"value": "active", "label": "Active"},
+            "site": {
+                "id": site_id, "name": "site{}".format(site_id),
+                "url": "{}/dcim/sites/{}/".format(self.url, site_id),
+            },
+            "comments": "", "tags": [], "custom_fields": {"owner": None},
+            "created": "2020-01-01", "last_updated": "2020-01-01T00:00:00Z",
+        }
+
+    def list_objects(self, model_route, path, params):
+        count = self.counts[model_route]
+        if "id" in params:
+            ids = sorted(int(i) for i in params["id"] if 0 < int(i) <= count)
+        else:
+            first_id = int(params.get("id__gt", ["0"])[0]) + 1
+            ids = range(first_id, count + 1)
+
+        limit = min(int(params.get("limit", ["50"])[0]), self.max_limit)
+        offset = int(params.get("offset", ["0"])[0])
+        page_ids = ids[offset:offset + limit]
+        next_url = None
+        if offset + limit < len(ids):
+            next_params = {k: v for k, v in params.items()}
+            next_params["limit"] = [str(limit)]
+            next_params["offset"] = [str(offset + limit)]
+            next_url = "{}{}?{}".format(
+                self.url.rsplit("/api", 1)[0], path,
+                urllib.parse.urlencode(next_params, doseq=True)
+            )
+
+        return {
+            "count": len(ids), "next": next_url, "previous": None,
+            "results": [self.build_object(model_route, i) for i in page_ids],
+        }
+
+    def create_objects(self, model_route, objects):
+        with self._lock:
+            first_id = self._next_id
+            self._next_id += len(objects)
+
+        return [
+            dict(self.build_object(model_route, i), **obj)
+            for i, obj in enumerate(objects, first_id)
+        ]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    _route_re = re.compile(r"^/api/(\w+/[\w-]+)/(?:(\d+)/)?$")
+
+    def log_message(self, *args):
+        pass
+
+    @property
+    def netbox(self):
+        return self.server.fake_netbox
+
+    def _parse_request(self):
+        with self.netbox._lock:
+            self.netbox.nb_requests += 1
+        if self.netbox.latency:
+            time.sleep(self.netbox.latency)
+
+        split_url = urllib.parse.urlsplit(self.path)
+        match = self._route_re.match(split_url.path)
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length)) if length else None
+        if not match or match.group(1) not in self.netbox.counts:
+            self._answer(404, {"detail": "Not found."})
+            return None
+
+        return (
+            split_url.path, match.group(1),
+            int(match.group(2)) if match.group(2) else None,
+            urllib.parse.parse_qs(split_url.query), body
+        )
+
+    def _answer(self, status, data=None):
+        body = json.dumps(data).encode() if data is not None else b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        request = self._parse_request()
+        if request is None:
+            return
+        path, model_route, object_id, params, _ = request
+
+        if object_id is None:
+            self._answer(
+                200, self.netbox.list_objects(model_route, path, params)
+            )
+        elif object_id <= self.netbox.counts[model_route]:
+            self._answer(
+                200, self.netbox.build_object(model_route, object_id)
+            )
+        else:
+            self._answer(404, {"detail": "Not found."})
+
+    def do_POST(self):
+        request = self._parse_request()
+        if request is None:
+            return
+        _, model_route, _, _, body = request
+
+        if isinstance(body, list):
+            self._answer(
+                201, self.netbox.create_objects(model_route, body)
+            )
+        else:
+            self._answer(
+                201, self.netbox.create_objects(model_route, [body])[0]
+            )
+
+    def do_PATCH(self):
+        request = self._parse_request()
+        if request is None:
+            return
+        _, model_route, object_id, _, body = request
+
+        objects = body if isinstance(body, list) else [
+            dict(body, id=object_id)
+        ]
+        updated = [
+            dict(self.netbox.build_object(model_route, obj["id"]), **obj)
+            for obj in objects
+        ]
+        self._answer(200, updated if isinstance(body, list) else updated[0])
+
+    do_PUT = do_PATCH
+
+    def do_DELETE(self):
+        if self._parse_request() is not None:
+            self._answer(204)
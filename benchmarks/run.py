@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+
+"""
+Benchmarks of netboxapi against a local fake Netbox
+
+Example:
+    python benchmarks/run.py --objects 100000 --latency 0.005
+
+For each benchmark, report the number of objects handled per second, the
+number of requests sent to the fake Netbox and the peak RSS. Each benchmark
+runs in its own process, so that its peak RSS does not depend on the
+previous ones.
+"""
+
+import argparse
+import multiprocessing
+import os
+import resource
+import sys
+import time
+
+sys.path.insert(
+    0, os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+
+from netboxapi import NetboxAPI, NetboxMapper  # noqa: E402
+from netboxapi.metrics import RequestMetrics  # noqa: E402
+
+from fake_netbox import FakeNetbox  # noqa: E402
+
+
+def bench_get(mapper, args):
+    return sum(1 for _ in mapper.get(limit=args.limit))
+
+
+def bench_get_concurrent(mapper, args):
+    return sum(1 for _ in mapper.get(limit=args.limit, max_workers=8))
+
+
+def bench_get_keyset(mapper, args):
+    return sum(1 for _ in mapper.get(limit=args.limit, keyset=True))
+
+
+def bench_get_stream(mapper, args):
+    return sum(1 for _ in mapper.get(limit=args.limit, stream=True))
+
+
+def bench_get_records(mapper, args):
+    return sum(1 for _ in mapper.get(limit=args.limit, as_records=True))
+
+
+def bench_build_mappers(mapper, args):
+    objects = dict(mapper.netbox_api.get_many(
+        {mapper._route: {"limit": args.limit}}
+    ))[mapper._route]
+    started_at = time.perf_counter()
+    nb_mappers = sum(
+        1 for _ in mapper._iterate_over_new_mappers(mapper._route, objects)
+    )
+    return nb_mappers, time.perf_counter() - started_at
+
+
+def bench_foreign_keys_lazy(mapper, args):
+    nb_objects = min(args.objects, args.fk_objects)
+    devices = mapper.get(limit=args.limit)
+    return sum(1 for _, d in zip(range(nb_objects), devices) if d.site)
+
+
+def bench_foreign_keys_prefetch(mapper, args):
+    nb_objects = min(args.objects, args.fk_objects)
+    devices = mapper.get(limit=args.limit, prefetch=["site"])
+    return sum(1 for _, d in zip(range(nb_objects), devices) if d.site)
+
+
+def bench_to_dict(mapper, args):
+    devices = list(mapper.get(limit=args.limit))
+    started_at = time.perf_counter()
+    for device in devices:
+        device.to_dict()
+    return len(devices), time.perf_counter() - started_at
+
+
+def bench_bulk_create(mapper, args):
+    nb_objects = min(args.objects, args.write_objects)
+    created = mapper.bulk_create(
+        ({"name": "new{}".format(i), "site": 1} for i in range(nb_objects)),
+        batch_size=args.limit
+    )
+    return len(created)
+
+
+def bench_post(mapper, args):
+    nb_objects = min(args.objects, args.write_objects) // 10
+    for i in range(nb_objects):
+        mapper.post(name="new{}".format(i), site=1)
+    return nb_objects
+
+
+BENCHMARKS = {
+    "get": bench_get,
+    "get_concurrent": bench_get_concurrent,
+    "get_keyset": bench_get_keyset,
+    "get_stream": bench_get_stream,
+    "get_records": bench_get_records,
+    "build_mappers": bench_build_mappers,
+    "fk_lazy": bench_foreign_keys_lazy,
+    "fk_prefetch": bench_foreign_keys_prefetch,
+    "to_dict": bench_to_dict,
+    "bulk_create": bench_bulk_create,
+    "post": bench_post,
+}
+
+
+def run_benchmark(name, url, args):
+    api = NetboxAPI(url, pool_maxsize=16)
+    metrics = RequestMetrics()
+    api.after_request_hooks.append(metrics)
+    mapper = NetboxMapper(api, "dcim", "devices")
+
+    started_at = time.perf_counter()
+    result = BENCHMARKS[name](mapper, args)
+    if isinstance(result, tuple):
+        nb_objects, elapsed = result
+    else:
+        nb_objects, elapsed = result, time.perf_counter() - started_at
+
+    nb_requests = sum(r["count"] for r in metrics.report().values())
+    return {
+        "name": name, "objects": nb_objects, "seconds": elapsed,
+        "objects_per_second": nb_objects / elapsed if elapsed else 0,
+        "requests": nb_requests,
+        "peak_rss_mb": _get_peak_rss() / 1024 / 1024,
+    }
+
+
+def run_benchmark_in_subprocess(name, url, args):
+    """
+    Run a benchmark in a new process, so that the peak RSS measured only
+    depends on this benchmark
+    """
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(1) as pool:
+        return pool.apply(run_benchmark, (name, url, args))
+
+
+def _get_peak_rss():
+    """
+    :returns: peak resident set size of the process, in bytes
+    """
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on linux, bytes on macos
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--objects", type=int, default=10000,
+        help="number of devices in the dataset"
+    )
+    parser.add_argument(
+        "--sites", type=int, default=100,
+        help="number of sites referenced by the devices"
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0,
+        help="seconds waited by the fake netbox before each answer"
+    )
+    parser.add_argument(
+        "--limit", type=int, default=1000, help="objects per page"
+    )
+    parser.add_argument(
+        "--fk-objects", type=int, default=2000,
+        help="maximum number of devices to resolve foreign keys of"
+    )
+    parser.add_argument(
+        "--write-objects", type=int, default=10000,
+        help="maximum number of devices to create"
+    )
+    parser.add_argument(
+        "benchmarks", nargs="*", metavar="benchmark",
+        help="benchmarks to run, all of them by default, among: {}".format(
+            ", ".join(BENCHMARKS)
+        )
+    )
+
+    args = parser.parse_args()
+    for name in args.benchmarks:
+        if name not in BENCHMARKS:
+            parser.error("unknown benchmark: {}".format(name))
+    return args
+
+
+def main():
+    args = parse_args()
+    fake_netbox = FakeNetbox(
+        nb_devices=args.objects, nb_sites=args.sites, latency=args.latency,
+        max_limit=args.limit
+    )
+
+    line = (
+        "{name:<16} {objects:>10} {seconds:>9.3f} {objects_per_second:>12.0f}"
+        " {requests:>9} {peak_rss_mb:>12.1f}"
+    )
+    print("{:<16} {:>10} {:>9} {:>12} {:>9} {:>12}".format(
+        "benchmark", "objects", "seconds", "objects/s", "requests",
+        "peak RSS MB"
+    ))
+    with fake_netbox:
+        for name in args.benchmarks or BENCHMARKS:
+            print(line.format(
+                **run_benchmark_in_subprocess(name, fake_netbox.url, args)
+            ))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,7 @@
 #!/usr/bin/env python3
 
 from .api import NetboxAPI
+from .cache import ResponseCache
 from .mapper import NetboxMapper
+from .retry import RetryPolicy
+from .schema import SchemaCache
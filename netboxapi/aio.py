@@ -0,0 +1,663 @@
+"""
+Asyncio flavor of the Netbox API and mappers
+
+Needs the optional dependency `httpx`, used as HTTP transport.
+"""
+
+import asyncio
+import collections.abc
+import copy
+import time
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+from .api import NetboxAPI, _build_next_url_params, _get_model_route
+from .exceptions import PartialMapperError
+from .mapper import (
+    NetboxMapper, NetboxPassiveMapper, logger, _MISSING, _flatten_object
+)
+from .schema import ModelSchema
+
+
+class AsyncNetboxAPI(NetboxAPI):
+    """
+    Same as `NetboxAPI`, but all http methods are coroutines
+
+    :param client: `httpx.AsyncClient` to use to send requests. A new one is
+        created if not specified, with the timeouts of this api and at most
+        `pool_maxsize` connections. `pool_connections` is ignored, as httpx
+        shares a single pool between all hosts.
+
+    `response_cache` and `single_flight` are not supported.
+    """
+
+    def __init__(self, url, *args, client=None, **kwargs):
+        if httpx is None:
+            raise ImportError(
+                "httpx is needed to use AsyncNetboxAPI, install it with "
+                "`pip install netboxapi[async]`"
+            )
+        kwargs.setdefault("single_flight", False)
+        super().__init__(url, *args, **kwargs)
+        if self.response_cache is not None:
+            raise ValueError(
+                "response_cache is not supported by the async api"
+            )
+        elif self.single_flight:
+            raise ValueError("single_flight is not supported by the async api")
+
+        self.session.close()
+        self.session = client or httpx.AsyncClient(
+            timeout=httpx.Timeout(
+                None, connect=self.connect_timeout, read=self.read_timeout
+            ),
+            limits=httpx.Limits(
+                max_connections=self.pool_maxsize,
+                max_keepalive_connections=self.pool_maxsize
+            )
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+    async def aclose(self):
+        await self.session.aclose()
+
+    async def get(self, route, **kwargs):
+        """
+        :returns results: answer, as an unpacked json
+        """
+        response = await self._generic_http_method_request(
+            "get", route, **kwargs
+        )
+        return self._handle_json_response(response)
+
+    def iter_get(self, route, chunk_size=None, **kwargs):
+        raise ValueError(
+            "Answers cannot be decoded while received by the async api"
+        )
+
+    async def get_many(self, routes_with_params, max_workers=8):
+        """
+        Get several routes concurrently, following their pagination
+
+        See `NetboxAPI.get_many()`. Routes are fetched by tasks, with at most
+        `max_workers` of them at once.
+        """
+        if not isinstance(routes_with_params, collections.abc.Mapping):
+            routes_with_params = dict.fromkeys(routes_with_params)
+
+        semaphore = asyncio.Semaphore(max_workers)
+
+        async def get_route(route, params):
+            async with semaphore:
+                return route, await self._get_all_pages(route, params)
+
+        tasks = [
+            asyncio.ensure_future(get_route(route, params))
+            for route, params in routes_with_params.items()
+        ]
+        try:
+            for task in asyncio.as_completed(tasks):
+                yield await task
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _get_all_pages(self, route, params=None):
+        """
+        See `NetboxAPI._get_all_pages()`.
+        """
+        params = dict(params or {})
+        response = await self.get(route, params=params)
+        if not isinstance(response, dict) or "results" not in response:
+            return response
+
+        results = response["results"]
+        while response.get("next"):
+            params = _build_next_url_params(params, response["next"])
+            response = await self.get(route, params=params)
+            results.extend(response["results"])
+
+        return results
+
+    async def post(self, route, **kwargs):
+        """
+        :returns added_object: new added object, as an unpacked json
+        """
+        response = await self._generic_http_method_request(
+            "post", route, **kwargs
+        )
+        return self._handle_json_response(response)
+
+    async def put(self, route, **kwargs):
+        """
+        :returns updated_object: updated object, as an unpacked json
+        """
+        response = await self._generic_http_method_request(
+            "put", route, **kwargs
+        )
+        return self._handle_json_response(response)
+
+    async def patch(self, route, **kwargs):
+        """
+        :returns updated_object: updated object, as an unpacked json
+        """
+        response = await self._generic_http_method_request(
+            "patch", route, **kwargs
+        )
+        return self._handle_json_response(response)
+
+    async def delete(self, route, **kwargs):
+        """
+        :returns req_answer: answer as an httpx response (as `delete` does
+            not return any data)
+        """
+        return await self._generic_http_method_request(
+            "delete", route, **kwargs
+        )
+
+    async def options(self, route, **kwargs):
+        """
+        :returns results: answer, as an unpacked json. Answers on model
+            routes are taken from `schema_cache` if set.
+        """
+        if self._should_use_schema_cache(route, kwargs):
+            schema = await self._get_route_schema(route)
+            return copy.deepcopy(schema.options)
+
+        response = await self._generic_http_method_request(
+            "options", route, **kwargs
+        )
+        return self._handle_json_response(response)
+
+    async def get_schema(self, app_name, model):
+        """
+        See `NetboxAPI.get_schema()`.
+        """
+        return await self._get_route_schema(
+            self.build_model_route(app_name, model)
+        )
+
+    async def get_version(self):
+        """
+        :returns: version of netbox, requested once
+        """
+        if self._version is None:
+            self._version = (await self.get("status/"))["netbox-version"]
+
+        return self._version
+
+    async def _get_route_schema(self, route):
+        if self.schema_cache is None:
+            return ModelSchema(await self._request_options(route))
+
+        model_route = _get_model_route(route)
+        version = (
+            await self.get_version() if self.schema_cache.directory else None
+        )
+        schema = self.schema_cache.get(model_route, version)
+        if schema is None:
+            schema = self.schema_cache.set(
+                model_route, await self._request_options(model_route + "/"),
+                version
+            )
+
+        return schema
+
+    async def _request_options(self, route):
+        response = await self._generic_http_method_request("options", route)
+        return self._handle_json_response(response)
+
+    async def graphql(self, query, variables=None):
+        """
+        Send a query to the graphql api of netbox
+
+        See `NetboxAPI.graphql()`.
+        """
+        response = await self._generic_http_method_request(
+            "post", self.graphql_url,
+            json={"query": query, "variables": variables or {}}
+        )
+        return self._handle_graphql_response(response)
+
+    async def _generic_http_method_request(self, method, route, **kwargs):
+        for hook in self.before_request_hooks:
+            hook(method, route, kwargs)
+
+        stats = {"retries": 0}
+        started_at = time.perf_counter()
+        try:
+            response = await self._send_request(
+                method, route, stats, **kwargs
+            )
+        except Exception as e:
+            self._run_after_request_hooks(
+                method, route, started_at, stats,
+                getattr(e, "response", None), error=e
+            )
+            raise
+
+        self._run_after_request_hooks(
+            method, route, started_at, stats, response
+        )
+        return response
+
+    async def _send_request(self, method, route, stats, **kwargs):
+        """
+        :param stats: dict filled with the number of `retries` done
+        """
+        req_url = self._build_request_url(route)
+        self._encode_json_body(kwargs, body_kwarg="content")
+        if self.username and self.password:
+            kwargs["auth"] = (self.username, self.password)
+        elif self.token:
+            headers = kwargs["headers"] = dict(kwargs.get("headers") or {})
+            headers["Authorization"] = "Token {}".format(self.token)
+        if self.timeout is not None:
+            kwargs.setdefault("timeout", httpx.Timeout(
+                None, connect=self.connect_timeout, read=self.read_timeout
+            ))
+
+        attempt = 1
+        while True:
+            try:
+                response = await self.session.request(
+                    method.upper(), req_url, **kwargs
+                )
+            except httpx.TransportError as e:
+                if not self._should_retry(method, attempt):
+                    raise
+                delay = self.retry_policy.get_backoff(attempt)
+                logger.debug(
+                    "%s %s failed (%s), retrying in %.2fs",
+                    method.upper(), req_url, e, delay
+                )
+            else:
+                if response.is_success or not self._should_retry(
+                        method, attempt, response.status_code
+                ):
+                    break
+                delay = self.retry_policy.get_backoff(
+                    attempt, response.headers.get("Retry-After")
+                )
+                logger.debug(
+                    "%s %s failed with status %s, retrying in %.2fs",
+                    method.upper(), req_url, response.status_code, delay
+                )
+
+            await asyncio.sleep(delay)
+            attempt += 1
+            stats["retries"] += 1
+
+        response.raise_for_status()
+        return response
+
+
+class AsyncNetboxMapper(NetboxMapper):
+    """
+    Same as `NetboxMapper`, but to use with an `AsyncNetboxAPI`
+
+    `get()` is an async generator, and `post()`, `put()`, `delete()` and
+    `options()` are coroutines. Foreign keys are awaitables:
+
+        >>> devices_mapper = AsyncNetboxMapper(api, "dcim", "devices")
+        >>> async for device in devices_mapper.get():
+        ...     site = await device.site
+    """
+
+    def _mapper_base_class(self, passive_mapper=False):
+        if passive_mapper:
+            return AsyncNetboxPassiveMapper
+        else:
+            return AsyncNetboxMapper
+
+    async def get(
+            self, *args, limit=50, max_workers=None, prefetch=None,
+            keyset=False, stream=False, as_records=False, brief=False,
+            fields=None, **kwargs
+    ):
+        """
+        Get netbox objects
+
+        See `NetboxMapper.get()`. `max_workers` and `stream` are not
+        supported, as pages are requested one after the other and decoded
+        once received.
+        """
+        if max_workers:
+            raise ValueError("max_workers is not supported by async mappers")
+        elif stream:
+            raise ValueError("stream is not supported by async mappers")
+        elif as_records and prefetch:
+            raise ValueError("prefetch cannot be used with as_records")
+
+        self._build_projection_params(kwargs, brief, fields)
+        kwargs.setdefault("limit", limit)
+        self._replace_params_mappers_by_id(kwargs)
+        route = self._build_get_route(args)
+
+        new_mappers_props = self._iterate_over_get_query(
+            route, kwargs, keyset=keyset
+        )
+        if as_records:
+            record_fields = None if as_records is True else tuple(as_records)
+            partial = bool(brief or fields or record_fields)
+            async for new_record_props in new_mappers_props:
+                yield self._build_new_record(
+                    new_record_props, record_fields, partial
+                )
+            return
+
+        new_mappers = self._iterate_over_new_mappers(
+            route, new_mappers_props, partial=bool(brief or fields)
+        )
+        if prefetch:
+            new_mappers = self._prefetch_foreign_keys(
+                new_mappers, prefetch, kwargs["limit"]
+            )
+
+        async for new_mapper in new_mappers:
+            yield new_mapper
+
+    async def graphql(self, query, variables=None, models=None):
+        """
+        Get netbox objects with a graphql query
+
+        See `NetboxMapper.graphql()`.
+        """
+        data = await self.netbox_api.graphql(query, variables)
+        for new_mapper in self._iterate_over_graphql_mappers(
+                data, models or {}
+        ):
+            yield new_mapper
+
+    async def export(
+            self, *args, fmt="jsonl", fields=None, out=None,
+            foreign_keys="id", limit=1000, **kwargs
+    ):
+        """
+        Export netbox objects to a JSON Lines or CSV stream
+
+        See `NetboxMapper.export()`. Pages are entirely decoded before their
+        objects are written.
+        """
+        writer = self._build_export_writer(fmt, out, fields, foreign_keys)
+        kwargs.setdefault("limit", limit)
+        self._replace_params_mappers_by_id(kwargs)
+
+        nb_objects = 0
+        async for obj in self._iterate_over_get_query(
+                self._build_get_route(args), kwargs
+        ):
+            writer.write(_flatten_object(obj, fields, foreign_keys))
+            nb_objects += 1
+
+        writer.close()
+        return nb_objects
+
+    async def count(self, *args, **kwargs):
+        """
+        Count netbox objects matching filters, without getting them
+
+        See `NetboxMapper.count()`.
+        """
+        response = await self.netbox_api.get(
+            self._build_get_route(args),
+            params=self._build_count_params(kwargs)
+        )
+        return response["count"]
+
+    async def exists(self, *args, **kwargs):
+        """
+        Check if any netbox object matches filters, without getting it
+
+        See `NetboxMapper.count()`.
+        """
+        return await self.count(*args, **kwargs) > 0
+
+    async def _iterate_over_new_mappers(
+            self, route, new_mappers_props, partial=False
+    ):
+        async for nm_prop in new_mappers_props:
+            try:
+                new_mapper = self._build_new_mapper_from(
+                    nm_prop, self._build_new_mapper_route(route, nm_prop),
+                    partial=partial
+                )
+            except (KeyError, TypeError):
+                # Result objects have no id, cannot build a mapper from them,
+                # yield them as received
+                yield nm_prop
+                async for nm_prop in new_mappers_props:
+                    yield nm_prop
+                return
+
+            yield new_mapper
+
+    async def _prefetch_foreign_keys(self, mappers, foreign_keys, batch_size):
+        batch = []
+        async for mapper in mappers:
+            batch.append(mapper)
+            if len(batch) >= batch_size:
+                await self._resolve_foreign_keys(batch, foreign_keys)
+                for mapper in batch:
+                    yield mapper
+                batch = []
+
+        if batch:
+            await self._resolve_foreign_keys(batch, foreign_keys)
+            for mapper in batch:
+                yield mapper
+
+    async def _resolve_foreign_keys(self, mappers, foreign_keys):
+        ids_by_model, references = self._list_foreign_keys_to_resolve(
+            mappers, foreign_keys
+        )
+
+        foreign_objects = {}
+        for (app_name, model), ids in ids_by_model.items():
+            fk_mapper = self._mapper_base_class()(
+                self.netbox_api, app_name, model
+            )
+            for chunk in self._chunk_prefetch_ids(ids):
+                async for fk in fk_mapper.get(id=chunk, limit=len(chunk)):
+                    foreign_objects[(app_name, model, fk.id)] = fk
+
+        self._cache_resolved_foreign_keys(references, foreign_objects)
+
+    async def _iterate_over_get_query(self, route, params, keyset=False):
+        """
+        Iterate over a get query and handle possible pagination
+        """
+        if keyset:
+            params = self._build_keyset_params(params)
+
+        response = await self.netbox_api.get(route, params=params)
+        if "results" not in response:
+            if isinstance(response, list):
+                for nm_prop in response:
+                    yield nm_prop
+            else:
+                yield response
+            return
+
+        while True:
+            for nm_prop in response["results"]:
+                yield nm_prop
+
+            params = self._build_next_page_params(
+                params, response, next(reversed(response["results"]), None),
+                keyset
+            )
+            if params is None:
+                return
+            response = await self.netbox_api.get(route, params=params)
+
+    async def post(self, refetch=None, **json):
+        """
+        Post a new netbox object
+
+        See `NetboxMapper.post()`.
+        """
+        self._replace_params_mappers_by_id(json)
+        new_mapper_dict = await self.netbox_api.post(self._route, json=json)
+        new_mapper_route = self._route + "{}/".format(new_mapper_dict["id"])
+        if not self._should_refetch_after_post(refetch):
+            return self._build_new_mapper_from(
+                new_mapper_dict, new_mapper_route
+            )
+
+        try:
+            async for new_mapper in self.get(new_mapper_dict["id"]):
+                return new_mapper
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 404:
+                logger.debug(
+                    "Object cannot be fetched after POST by using the same "
+                    "endpoint, returning a passive mapper based on the answer"
+                )
+                return self._build_new_mapper_from(
+                    new_mapper_dict, new_mapper_route, passive_mapper=True
+                )
+            raise
+
+    async def put(self):
+        """
+        Update an already existing netbox object
+
+        See `NetboxMapper.put()`.
+        """
+        assert getattr(self, "id", None) is not None, "self.id does not exist"
+        if self.__partial__:
+            raise PartialMapperError()
+
+        serialized = self.to_dict()
+        response = await self.netbox_api.put(self._route, json=serialized)
+        self.__upstream_state__ = copy.deepcopy(serialized)
+        return response
+
+    async def save(self):
+        """
+        Update an already existing netbox object with only what changed
+
+        See `NetboxMapper.save()`.
+        """
+        assert getattr(self, "id", None) is not None, "self.id does not exist"
+
+        changes = self.get_changes()
+        if not changes:
+            return None
+
+        response = await self.netbox_api.patch(self._route, json=changes)
+        self._mark_changes_as_saved(changes)
+        return response
+
+    async def delete(self, id=None):
+        """
+        Delete netbox object or self
+
+        See `NetboxMapper.delete()`.
+        """
+        return await self.netbox_api.delete(self._build_delete_route(id))
+
+    async def bulk_create(self, objects, batch_size=50):
+        """
+        Create multiple netbox objects, with one request per batch
+
+        See `NetboxMapper.bulk_create()`.
+        """
+        route = self._build_bulk_route()
+        new_mappers = []
+        for batch in self._iterate_over_bulk_create_batches(
+                objects, batch_size
+        ):
+            new_mappers.extend(self._iterate_over_bulk_response(
+                await self.netbox_api.post(route, json=batch)
+            ))
+
+        return new_mappers
+
+    async def bulk_update(self, mappers, batch_size=50):
+        """
+        Update multiple netbox objects, with one request per batch
+
+        See `NetboxMapper.bulk_update()`.
+        """
+        route = self._build_bulk_route()
+        updated = []
+        for batch, serialized in self._iterate_over_bulk_update_batches(
+                mappers, batch_size
+        ):
+            updated.extend(
+                await self.netbox_api.patch(route, json=serialized)
+            )
+            self._mark_bulk_changes_as_saved(batch, serialized)
+
+        return updated
+
+    async def bulk_delete(self, ids, batch_size=50):
+        """
+        Delete multiple netbox objects, with one request per batch
+
+        See `NetboxMapper.bulk_delete()`.
+        """
+        route = self._build_bulk_route()
+        return [
+            await self.netbox_api.delete(route, json=batch)
+            for batch in self._iterate_over_bulk_delete_batches(
+                ids, batch_size
+            )
+        ]
+
+    async def options(self):
+        """
+        Get netbox options on a model
+        """
+        return await self.netbox_api.options(self._route)
+
+    async def get_schema(self):
+        """
+        See `NetboxMapper.get_schema()`.
+        """
+        return await self.netbox_api.get_schema(
+            self.__app_name__, self.__model__
+        )
+
+    async def validate(self):
+        """
+        See `NetboxMapper.validate()`.
+        """
+        schema = await self.get_schema()
+        schema.validate(self.to_dict(), partial=self.__partial__)
+
+    async def _get_foreign_object(self, attr):
+        if hasattr(self, "_{}".format(attr)):
+            return getattr(self, "_{}".format(attr))
+
+        fk = self._get_cached_foreign_object(attr, _MISSING)
+        if fk is _MISSING:
+            fk = await self._fetch_foreign_object(
+                self.__original_foreign_keys_url__[attr]
+            )
+            self._cache_foreign_object(attr, fk)
+
+        return fk
+
+    async def _fetch_foreign_object(self, url):
+        app_name, model, params = self._split_foreign_key_url(url)
+        fk = [
+            m async for m in self._mapper_base_class()(
+                self.netbox_api, app_name, model
+            ).get(*params)
+        ]
+        return self._unpack_foreign_object(fk)
+
+
+class AsyncNetboxPassiveMapper(NetboxPassiveMapper, AsyncNetboxMapper):
+    pass
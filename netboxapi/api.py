@@ -1,6 +1,29 @@
 
+import codecs
+import collections
+import collections.abc
+import concurrent.futures
+import copy
+import json
+import logging
 import re
 import requests
+import threading
+import time
+import urllib.parse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from .cache import LRUCache
+from .exceptions import GraphQLError
+from .schema import ModelSchema
+from .stream import JSONStreamDecoder
+
+
+logger = logging.getLogger("netboxapi")
 
 
 class _HTTPTokenAuth(requests.auth.AuthBase):
@@ -20,18 +43,178 @@ class _HTTPTokenAuth(requests.auth.AuthBase):
         return r
 
 
+#: request done by a `NetboxAPI`, sent to its `after_request_hooks`
+RequestEvent = collections.namedtuple("RequestEvent", (
+    "method", "route", "status_code", "elapsed", "response_size", "retries",
+    "error"
+))
+
+
+def _get_model_route(route):
+    """
+    :returns: route of the model of `route`, like `dcim/devices` for
+        `dcim/devices/1/interfaces/`
+    """
+    path = urllib.parse.urlsplit(route).path
+    return "/".join(path.strip("/").split("/")[:2])
+
+
+def _build_next_url_params(params, next_url):
+    """
+    :param next_url: `next` url of a paginated answer
+    :returns: copy of `params`, updated with the query of `next_url`
+    """
+    next_query = urllib.parse.urlsplit(next_url).query
+    next_params = dict(params)
+    next_params.update(
+        (k, v[0] if len(v) == 1 else v)
+        for k, v in urllib.parse.parse_qs(next_query).items()
+    )
+    return next_params
+
+
+def _build_cached_response(entry, url):
+    """
+    :param entry: `CachedResponse` to convert
+    :returns: `requests.Response` of a stored answer
+    """
+    response = requests.Response()
+    response.status_code = 200
+    response.url = url
+    response.headers = requests.structures.CaseInsensitiveDict(entry.headers)
+    response._content = entry.body
+    return response
+
+
+class _SingleFlight():
+    """
+    Share the result of a call with the identical calls done concurrently
+
+    The first call for a key is done, and the calls for the same key
+    received while it is in flight wait for it and get its result, or its
+    exception.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, func, *args, **kwargs):
+        with self._lock:
+            call = self._calls.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = self._calls[key] = concurrent.futures.Future()
+
+        if not is_leader:
+            return call.result()
+
+        try:
+            result = func(*args, **kwargs)
+        except BaseException as e:
+            call.set_exception(e)
+            raise
+        else:
+            call.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+
 class NetboxAPI():
-    def __init__(self, url, username=None, password=None, token=None):
+    """
+    :param fk_cache_size: if set, foreign objects resolved by the mappers
+        using this api are shared in a cache of this size, keyed by their url
+    :param fk_cache_ttl: number of seconds after which a foreign object in
+        the shared cache is fetched again
+    :param pool_connections: number of connection pools to cache, one per
+        host
+    :param pool_maxsize: maximum number of connections kept alive per host.
+        Should be at least the number of threads sharing this api.
+    :param connect_timeout: number of seconds to wait for the connection to
+        the server, or None to wait forever
+    :param read_timeout: number of seconds to wait for the server to send
+        data, or None to wait forever
+    :param adapter: `requests` transport adapter to mount on the session,
+        instead of an `HTTPAdapter` built from `pool_connections` and
+        `pool_maxsize`
+    :param retry_policy: `RetryPolicy` used to retry requests failing because
+        of a transient error. Requests are not retried if not set.
+    :param json_codec: object with `loads` and `dumps` functions, like the
+        `json` module, used to encode request bodies and decode answers.
+        Defaults to `orjson` if installed, `json` otherwise.
+    :param response_cache: `ResponseCache` storing answers to GET requests,
+        to revalidate them with conditional requests or reuse them during
+        their ttl. Any write request on a model route invalidates its
+        stored answers.
+    :param graphql_url: url of the graphql api. Defaults to `/graphql/` next
+        to the rest api.
+    :param single_flight: if True, identical GET and OPTIONS requests done
+        concurrently, by threads sharing this api, are sent only once and
+        share the same answer
+    :param schema_cache: `SchemaCache` keeping the OPTIONS answers of model
+        routes, to only request them once
+
+    Callables can be added to `before_request_hooks`, to be called before
+    each request with its method, route and kwargs, and to
+    `after_request_hooks`, to be called after each request with a
+    `RequestEvent`.
+    """
+
+    def __init__(
+            self, url, username=None, password=None, token=None,
+            fk_cache_size=None, fk_cache_ttl=None, pool_connections=10,
+            pool_maxsize=10, connect_timeout=None, read_timeout=None,
+            adapter=None, retry_policy=None, json_codec=None,
+            response_cache=None, graphql_url=None, single_flight=True,
+            schema_cache=None
+    ):
         self.username = username
         self.password = password
         self.token = token
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.pool_maxsize = pool_maxsize
+        self.retry_policy = retry_policy
+        self.json_codec = json_codec or orjson or json
+        self.response_cache = response_cache
+        self.before_request_hooks = []
+        self.after_request_hooks = []
+        self.single_flight = single_flight
+        self.schema_cache = schema_cache
+        self._version = None
+        self._single_flight = _SingleFlight()
 
         if re.match("^.*://", url):
             self.url = url.rstrip("/")
         else:
             self.url = "http://{}".format(url.rstrip("/"))
+        self.graphql_url = graphql_url or "{}/graphql/".format(
+            re.sub("/api$", "", self.url)
+        )
 
         self.session = requests.Session()
+        adapter = adapter or requests.adapters.HTTPAdapter(
+            pool_connections=pool_connections, pool_maxsize=pool_maxsize
+        )
+        for prefix in ("http://", "https://"):
+            self.session.mount(prefix, adapter)
+
+        #: cache of foreign objects shared by all mappers, by url
+        self.fk_cache = (
+            LRUCache(fk_cache_size, fk_cache_ttl) if fk_cache_size else None
+        )
+
+    @property
+    def timeout(self):
+        """
+        :returns: timeout to use for requests, as expected by `requests`
+        """
+        if self.connect_timeout is None and self.read_timeout is None:
+            return None
+
+        return (self.connect_timeout, self.read_timeout)
 
     def get(self, route, **kwargs):
         """
@@ -40,6 +223,94 @@ class NetboxAPI():
         response = self._generic_http_method_request("get", route, **kwargs)
         return self._handle_json_response(response)
 
+    def get_many(self, routes_with_params, max_workers=8):
+        """
+        Get several routes concurrently, following their pagination
+
+        Routes are fetched by a pool of threads sharing the session of this
+        api, so should not exceed `pool_maxsize`.
+
+        Example:
+            >>> dict(netbox_api.get_many({
+            ...     "dcim/sites/": {"limit": 1000},
+            ...     "dcim/racks/": {"limit": 1000, "site_id": 1},
+            ...     "dcim/platforms/": None,
+            ... }))
+            {"dcim/platforms/": [...], "dcim/sites/": [...], ...}
+
+        :param routes_with_params: dict of the params to request each route
+            with, or list of routes
+        :param max_workers: maximum number of routes fetched at once
+        :returns results: generator of `(route, result)` tuples, yielded as
+            soon as each route has been entirely fetched. The result is the
+            list of objects of all pages for a paginated answer, or the
+            answer as an unpacked json otherwise.
+        """
+        if not isinstance(routes_with_params, collections.abc.Mapping):
+            routes_with_params = dict.fromkeys(routes_with_params)
+
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers)
+        futures = {}
+        try:
+            for route, params in routes_with_params.items():
+                future = executor.submit(self._get_all_pages, route, params)
+                futures[future] = route
+            for future in concurrent.futures.as_completed(futures):
+                yield futures[future], future.result()
+        finally:
+            # do not fetch the remaining routes if stopped early
+            for future in futures:
+                future.cancel()
+            executor.shutdown()
+
+    def _get_all_pages(self, route, params=None):
+        """
+        :returns results: objects of all pages of a paginated answer, or the
+            answer itself if it is not paginated
+        """
+        params = dict(params or {})
+        response = self.get(route, params=params)
+        if not isinstance(response, dict) or "results" not in response:
+            return response
+
+        results = response["results"]
+        while response.get("next"):
+            params = _build_next_url_params(params, response["next"])
+            response = self.get(route, params=params)
+            results.extend(response["results"])
+
+        return results
+
+    def iter_get(self, route, chunk_size=65536, **kwargs):
+        """
+        Get a route and decode its answer while it is received
+
+        Objects are yielded one by one, and only the one being decoded is
+        kept in memory: items of the `results` list for a paginated answer,
+        items of a list, or the answer itself otherwise.
+
+        :param chunk_size: number of bytes read at once from the answer
+        :returns results: generator of the received objects, returning the
+            paginated answer without its `results`, or None if the answer
+            is not paginated
+        """
+        response = self._generic_http_method_request(
+            "get", route, stream=True, **kwargs
+        )
+        text_decoder = codecs.getincrementaldecoder(
+            response.encoding or "utf-8"
+        )()
+        json_decoder = JSONStreamDecoder()
+        with response:
+            for chunk in response.iter_content(chunk_size):
+                yield from json_decoder.feed(text_decoder.decode(chunk))
+            yield from json_decoder.feed(
+                text_decoder.decode(b"", final=True)
+            )
+
+        yield from json_decoder.close()
+        return json_decoder.remainder
+
     def post(self, route, **kwargs):
         """
         :returns added_object: new added object, as an unpacked json
@@ -78,28 +349,290 @@ class NetboxAPI():
 
     def options(self, route, **kwargs):
         """
-        :returns results: answer, as an unpacked json
+        :returns results: answer, as an unpacked json. Answers on model
+            routes are taken from `schema_cache` if set.
         """
+        if self._should_use_schema_cache(route, kwargs):
+            return copy.deepcopy(self._get_route_schema(route).options)
+
         response = self._generic_http_method_request("options", route, **kwargs)
         return self._handle_json_response(response)
 
+    def get_schema(self, app_name, model):
+        """
+        :returns: `ModelSchema` of a model, built from its OPTIONS answer,
+            and kept in `schema_cache` if set
+        """
+        return self._get_route_schema(self.build_model_route(app_name, model))
+
+    def get_version(self):
+        """
+        :returns: version of netbox, requested once
+        """
+        if self._version is None:
+            self._version = self.get("status/")["netbox-version"]
+
+        return self._version
+
+    def _should_use_schema_cache(self, route, kwargs):
+        return (
+            self.schema_cache is not None and not kwargs and
+            route.strip("/") == _get_model_route(route)
+        )
+
+    def _get_route_schema(self, route):
+        if self.schema_cache is None:
+            return ModelSchema(self._request_options(route))
+
+        model_route = _get_model_route(route)
+        version = self.get_version() if self.schema_cache.directory else None
+        schema = self.schema_cache.get(model_route, version)
+        if schema is None:
+            schema = self.schema_cache.set(
+                model_route, self._request_options(model_route + "/"),
+                version
+            )
+
+        return schema
+
+    def _request_options(self, route):
+        response = self._generic_http_method_request("options", route)
+        return self._handle_json_response(response)
+
+    def graphql(self, query, variables=None):
+        """
+        Send a query to the graphql api of netbox
+
+        Example:
+            >>> netbox_api.graphql(
+            ...     "query ($id: ID!) { device(id: $id) { name } }",
+            ...     {"id": 1}
+            ... )
+            {"device": {"name": "Some device"}}
+
+        :param variables: dict of the variables used by the query
+        :returns data: data answered, as an unpacked json
+        :raises GraphQLError: if netbox answers with errors
+        """
+        response = self._generic_http_method_request(
+            "post", self.graphql_url,
+            json={"query": query, "variables": variables or {}}
+        )
+        return self._handle_graphql_response(response)
+
     def _generic_http_method_request(self, method, route, **kwargs):
-        http_method = getattr(self.session, method)
-        req_url = "{}/{}".format(self.url.rstrip("/"), route.lstrip("/"))
-        if self.username and self.password:
-            response = http_method(
-                req_url, auth=(self.username, self.password), **kwargs
+        single_flight_key = self._get_single_flight_key(method, route, kwargs)
+        if single_flight_key is None:
+            return self._send_hooked_request(method, route, **kwargs)
+
+        return self._single_flight.do(
+            single_flight_key, self._send_hooked_request, method, route,
+            **kwargs
+        )
+
+    def _get_single_flight_key(self, method, route, kwargs):
+        """
+        :returns: key identifying the request among the concurrent ones, or
+            None if it cannot be shared
+        """
+        if not self.single_flight or method not in ("get", "options"):
+            return None
+        elif set(kwargs) - {"params"}:
+            # streamed answers can only be read once, and other arguments
+            # can change the answer
+            return None
+
+        return (method, requests.Request(
+            method.upper(), self._build_request_url(route),
+            params=kwargs.get("params")
+        ).prepare().url)
+
+    def _send_hooked_request(self, method, route, **kwargs):
+        for hook in self.before_request_hooks:
+            hook(method, route, kwargs)
+
+        stats = {"retries": 0}
+        started_at = time.perf_counter()
+        try:
+            response = self._handle_request(method, route, stats, **kwargs)
+        except Exception as e:
+            self._run_after_request_hooks(
+                method, route, started_at, stats,
+                getattr(e, "response", None), error=e
             )
+            raise
+
+        self._run_after_request_hooks(
+            method, route, started_at, stats, response,
+            stream=kwargs.get("stream", False)
+        )
+        return response
+
+    def _run_after_request_hooks(
+            self, method, route, started_at, stats, response, error=None,
+            stream=False
+    ):
+        if not self.after_request_hooks:
+            return
+
+        if response is None:
+            status_code = response_size = None
+        else:
+            status_code = response.status_code
+            response_size = (
+                int(response.headers.get("Content-Length", 0)) if stream
+                else len(response.content)
+            )
+
+        event = RequestEvent(
+            method, route, status_code, time.perf_counter() - started_at,
+            response_size, stats["retries"], error
+        )
+        for hook in self.after_request_hooks:
+            hook(event)
+
+    def _handle_request(self, method, route, stats, **kwargs):
+        """
+        :param stats: dict filled with the number of `retries` done
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        self._encode_json_body(kwargs)
+        req_url = self._build_request_url(route)
+        if self.username and self.password:
+            kwargs["auth"] = (self.username, self.password)
         elif self.token:
-            response = http_method(
-                req_url, auth=_HTTPTokenAuth(self.token), **kwargs
+            kwargs["auth"] = _HTTPTokenAuth(self.token)
+
+        if self.response_cache is None or kwargs.get("stream"):
+            return self._send_request(method, req_url, stats, **kwargs)
+        elif method == "get":
+            return self._send_cached_get_request(
+                route, req_url, stats, **kwargs
             )
-        else:
-            response = http_method(req_url, **kwargs)
+
+        response = self._send_request(method, req_url, stats, **kwargs)
+        if method in ("post", "put", "patch", "delete"):
+            self.response_cache.invalidate(self._get_cache_route(route))
+        return response
+
+    def _send_cached_get_request(self, route, req_url, stats, **kwargs):
+        """
+        Send a GET request through `self.response_cache`
+
+        A stored answer is returned as is during its ttl. Once expired, it is
+        revalidated with its `ETag` or `Last-Modified` header, if any.
+        """
+        cache = self.response_cache
+        cache_route = self._get_cache_route(route)
+        cache_key = requests.Request(
+            "GET", req_url, params=kwargs.get("params")
+        ).prepare().url
+
+        entry = cache.get(cache_route, cache_key)
+        if entry is not None:
+            if cache.is_fresh(entry):
+                return _build_cached_response(entry, cache_key)
+
+            headers = kwargs["headers"] = dict(kwargs.get("headers") or {})
+            entry_headers = requests.structures.CaseInsensitiveDict(
+                entry.headers
+            )
+            if "ETag" in entry_headers:
+                headers["If-None-Match"] = entry_headers["ETag"]
+            if "Last-Modified" in entry_headers:
+                headers["If-Modified-Since"] = entry_headers["Last-Modified"]
+
+        response = self._send_request("get", req_url, stats, **kwargs)
+        if response.status_code == 304 and entry is not None:
+            entry = cache.set(
+                cache_route, cache_key, entry.body, entry.headers
+            )
+            return _build_cached_response(entry, cache_key)
+        elif cache.ttl or cache.has_validators(response.headers):
+            cache.set(
+                cache_route, cache_key, response.content, response.headers
+            )
+
+        return response
+
+    def _get_cache_route(self, route):
+        """
+        :returns: model route of `route`, grouping the answers to invalidate
+            together
+        """
+        return _get_model_route(route)
+
+    def _send_request(self, method, req_url, stats, **kwargs):
+        http_method = getattr(self.session, method)
+        attempt = 1
+        while True:
+            try:
+                response = http_method(req_url, **kwargs)
+            except (
+                    requests.exceptions.ConnectionError,
+                    requests.exceptions.Timeout
+            ) as e:
+                if not self._should_retry(method, attempt):
+                    raise
+                delay = self.retry_policy.get_backoff(attempt)
+                logger.debug(
+                    "%s %s failed (%s), retrying in %.2fs",
+                    method.upper(), req_url, e, delay
+                )
+            else:
+                if response.ok or not self._should_retry(
+                        method, attempt, response.status_code
+                ):
+                    break
+                delay = self.retry_policy.get_backoff(
+                    attempt, response.headers.get("Retry-After")
+                )
+                logger.debug(
+                    "%s %s failed with status %s, retrying in %.2fs",
+                    method.upper(), req_url, response.status_code, delay
+                )
+
+            time.sleep(delay)
+            attempt += 1
+            stats["retries"] += 1
 
         response.raise_for_status()
         return response
 
+    def _encode_json_body(self, kwargs, body_kwarg="data"):
+        """
+        Encode the `json` kwarg of a request with `self.json_codec`
+
+        :param body_kwarg: kwarg to use to send the encoded body
+        """
+        if kwargs.get("json") is None:
+            kwargs.pop("json", None)
+            return
+
+        body = self.json_codec.dumps(kwargs.pop("json"))
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        kwargs[body_kwarg] = body
+
+        headers = kwargs["headers"] = dict(kwargs.get("headers") or {})
+        headers.setdefault("Content-Type", "application/json")
+
+    def _should_retry(self, method, attempt, status_code=None):
+        if self.retry_policy is None:
+            return False
+
+        return self.retry_policy.should_retry(method, attempt, status_code)
+
+    def _build_request_url(self, route):
+        """
+        :returns: url of a route of the api, or the route itself if it is
+            already an url
+        """
+        if re.match("^.*://", route):
+            return route
+
+        return "{}/{}".format(self.url.rstrip("/"), route.lstrip("/"))
+
     def build_model_url(self, app_name, model):
         return "{}/{}".format(
             self.url.rstrip("/"),
@@ -110,5 +643,18 @@ class NetboxAPI():
         return "{}/{}/".format(app_name, model)
 
     def _handle_json_response(self, response):
-        json_response = response.json()
+        try:
+            json_response = self.json_codec.loads(response.content)
+        except TypeError:
+            # codec only decoding text, as the json module before python 3.6
+            json_response = self.json_codec.loads(
+                response.content.decode(response.encoding or "utf-8")
+            )
         return json_response
+
+    def _handle_graphql_response(self, response):
+        json_response = self._handle_json_response(response)
+        if json_response.get("errors"):
+            raise GraphQLError(json_response["errors"])
+
+        return json_response["data"]
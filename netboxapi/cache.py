@@ -0,0 +1,181 @@
+import base64
+import collections
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+
+
+class LRUCache():
+    """
+    Thread-safe cache, bounded in size and with an optional expiration
+
+    :param maxsize: maximum number of entries. The least recently used
+        entries are evicted once reached.
+    :param ttl: number of seconds after which an entry expires, or None to
+        keep entries until evicted
+    """
+
+    def __init__(self, maxsize=1024, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        sentinel = object()
+        return self.get(key, sentinel) is not sentinel
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value, expires_at = self._entries[key]
+            except KeyError:
+                return default
+
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._entries[key]
+                return default
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        expires_at = None if self.ttl is None else time.monotonic() + self.ttl
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            try:
+                return self._entries.pop(key)[0]
+            except KeyError:
+                return default
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+#: answer stored in a `ResponseCache`
+CachedResponse = collections.namedtuple(
+    "CachedResponse", ("body", "headers", "stored_at")
+)
+
+
+class ResponseCache():
+    """
+    Cache of answers to GET requests, grouped by netbox model route
+
+    Answers having an `ETag` or a `Last-Modified` header are revalidated
+    with a conditional request once expired. Answers without these
+    validators are only kept if a `ttl` is set.
+
+    :param maxsize: maximum number of answers kept in memory
+    :param ttl: number of seconds during which an answer is used without
+        requesting netbox
+    :param directory: if set, answers are stored on disk in this directory
+        instead of in memory, and are kept between runs
+    """
+
+    def __init__(self, maxsize=1024, ttl=0, directory=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.directory = directory
+
+        self._entries = LRUCache(maxsize)
+        #: incremented on each invalidation, to make in memory entries of a
+        #: route unreachable without looking for them
+        self._generations = collections.defaultdict(int)
+        self._lock = threading.Lock()
+
+    def get(self, route, key):
+        """
+        :param route: model route of the answer
+        :param key: url of the request, with its parameters
+        :returns: the `CachedResponse` stored, or None
+        """
+        if self.directory:
+            return self._read_entry(route, key)
+
+        return self._entries.get((route, self._generations[route], key))
+
+    def set(self, route, key, body, headers):
+        entry = CachedResponse(body, dict(headers), time.time())
+        if self.directory:
+            self._write_entry(route, key, entry)
+        else:
+            self._entries.set((route, self._generations[route], key), entry)
+
+        return entry
+
+    def is_fresh(self, entry):
+        return time.time() - entry.stored_at < self.ttl
+
+    def has_validators(self, headers):
+        return "ETag" in headers or "Last-Modified" in headers
+
+    def invalidate(self, route):
+        """
+        Drop all answers stored for a model route
+        """
+        if self.directory:
+            shutil.rmtree(self._route_directory(route), ignore_errors=True)
+        else:
+            with self._lock:
+                self._generations[route] += 1
+
+    def clear(self):
+        if self.directory:
+            shutil.rmtree(self.directory, ignore_errors=True)
+        else:
+            self._entries.clear()
+
+    def _route_directory(self, route):
+        return os.path.join(self.directory, _hash(route))
+
+    def _entry_path(self, route, key):
+        return os.path.join(self._route_directory(route), _hash(key))
+
+    def _read_entry(self, route, key):
+        try:
+            with open(self._entry_path(route, key)) as f:
+                serialized = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        return CachedResponse(
+            base64.b64decode(serialized["body"]), serialized["headers"],
+            serialized["stored_at"]
+        )
+
+    def _write_entry(self, route, key, entry):
+        _write_json_atomically(self._entry_path(route, key), {
+            "body": base64.b64encode(entry.body).decode("ascii"),
+            "headers": entry.headers, "stored_at": entry.stored_at,
+        })
+
+
+def _hash(key):
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+def _write_json_atomically(path, obj):
+    """
+    Write `obj` as json in `path`, creating its directory if needed
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # write to a temporary file first, to never read a partial file
+    tmp_path = "{}.{}.tmp".format(path, threading.get_ident())
+    with open(tmp_path, "w") as f:
+        json.dump(obj, f)
+    os.replace(tmp_path, path)
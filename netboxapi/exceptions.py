@@ -5,3 +5,35 @@ class ForbiddenAsChildError(Exception):
 class ForbiddenAsPassiveMapperError(Exception):
     def __init__(self):
         super().__init__("No action is possible for this type of mapper")
+
+
+class PartialMapperError(Exception):
+    def __init__(self):
+        super().__init__(
+            "Mapper built from a partial representation of the object, use "
+            "save() to only send its changes or fetch the entire object"
+        )
+
+
+class ReadOnlyAPIError(Exception):
+    def __init__(self):
+        super().__init__("This api is read-only")
+
+
+class GraphQLError(Exception):
+    def __init__(self, errors):
+        #: errors sent by netbox, as unpacked json
+        self.errors = errors
+        super().__init__("; ".join(
+            str(error.get("message", error)) for error in errors
+        ))
+
+
+class ValidationError(Exception):
+    def __init__(self, errors):
+        #: error messages, by field
+        self.errors = errors
+        super().__init__("; ".join(
+            "{}: {}".format(field, message)
+            for field, message in errors.items()
+        ))
@@ -1,22 +1,57 @@
+import collections
+import concurrent.futures
+import copy
+import csv
+import itertools
+import json
 import logging
 import re
 import requests
+import sys
 
-from .api import NetboxAPI
-from .exceptions import ForbiddenAsChildError, ForbiddenAsPassiveMapperError
+from .api import NetboxAPI, _build_next_url_params
+from .exceptions import (
+    ForbiddenAsChildError, ForbiddenAsPassiveMapperError, PartialMapperError
+)
 
 
 logger = logging.getLogger("netboxapi")
 
+#: maximum number of ids to filter on in a single prefetch request
+_PREFETCH_MAX_IDS = 100
+
+_MISSING = object()
+
+#: attributes of netbox objects not serialized by `to_dict()`
+_NOT_SERIALIZED = ("created", "last_updated")
+
 
 class NetboxMapper():
-    def __init__(self, netbox_api, app_name, model, route=None):
+    """
+    :param refetch_after_post: if True, objects created with `post()` are
+        fetched again from netbox instead of being built from the POST
+        answer
+    """
+
+    def __init__(
+            self, netbox_api, app_name, model, route=None,
+            refetch_after_post=False
+    ):
         self.netbox_api = netbox_api
+        self.refetch_after_post = refetch_after_post
         self.__app_name__ = app_name
         self.__model__ = model
         self.__upstream_attrs__ = []
         self.__foreign_keys__ = []
         self.__original_foreign_keys_id__ = {}
+        self.__original_foreign_keys_url__ = {}
+
+        #: serialized state of the object, as last known upstream
+        self.__upstream_state__ = None
+
+        #: if the mapper has been built from a brief or projected object,
+        #: some of its attributes are missing
+        self.__partial__ = False
 
         #: cache for foreign keys properties.
         self._fk_cache = {}
@@ -37,7 +72,11 @@ class NetboxMapper():
 
         return self.to_dict() == other.to_dict()
 
-    def get(self, *args, limit=50, **kwargs):
+    def get(
+            self, *args, limit=50, max_workers=None, prefetch=None,
+            keyset=False, stream=False, as_records=False, brief=False,
+            fields=None, **kwargs
+    ):
         """
         Get netbox objects
 
@@ -55,26 +94,289 @@ class NetboxMapper():
         Some specific routes will not return objects with ID (this one for
         example: `/ipam/prefixes/{id}/available-prefixes/`). In this case, no
         mapper will be built from the result and it will be yield as received.
+
+        :param limit: number of objects requested per page
+        :param max_workers: if set, once the first page has been received,
+            fetch the remaining pages concurrently with this number of
+            threads. Objects are still yielded in the same order.
+        :param prefetch: list of foreign keys to resolve by batches, with one
+            request per related model for each batch of objects, instead of
+            one request per object when accessed
+        :param keyset: if True, iterate over objects ordered by id and request
+            each page by filtering on ids greater than the last received one,
+            instead of using an offset. The cost of a page then does not
+            depend on how deep it is in the listing.
+        :param stream: if True, decode each page while it is received, and
+            build mappers from its objects one by one, instead of loading
+            the entire page in memory first
+        :param as_records: if True, yield read-only records instead of
+            mappers. Records are named tuples, sharing one class per model
+            and set of fields, and are much lighter than mappers. Foreign
+            keys are kept as received. If a list of fields is given, records
+            only contain these fields. A record can be turned into a mapper
+            with `mapper_from_record()`.
+        :param brief: if True, request the brief representation of objects
+        :param fields: list of fields to request, instead of all of them.
+            Needs netbox 4.0 or later.
+
+        Mappers built from brief or projected objects are partial: as some of
+        their attributes are missing, they cannot be updated with `put()`,
+        only with `save()`.
         """
+        if as_records and prefetch:
+            raise ValueError("prefetch cannot be used with as_records")
+
+        self._build_projection_params(kwargs, brief, fields)
         kwargs.setdefault("limit", limit)
         self._replace_params_mappers_by_id(kwargs)
+        route = self._build_get_route(args)
 
+        new_mappers_props = self._iterate_over_get_query(
+            route, kwargs, max_workers=max_workers, keyset=keyset,
+            stream=stream
+        )
+        if as_records:
+            record_fields = None if as_records is True else tuple(as_records)
+            yield from self._iterate_over_new_records(
+                new_mappers_props, record_fields,
+                partial=bool(brief or fields or record_fields)
+            )
+            return
+
+        new_mappers = self._iterate_over_new_mappers(
+            route, new_mappers_props, partial=bool(brief or fields)
+        )
+        if prefetch:
+            new_mappers = self._prefetch_foreign_keys(
+                new_mappers, prefetch, kwargs["limit"]
+            )
+
+        yield from new_mappers
+
+    def graphql(self, query, variables=None, models=None):
+        """
+        Get netbox objects with a graphql query
+
+        The whole query is answered in one request. Objects received are
+        built into mappers of this model, and nested objects of the fields
+        listed in `models` into mappers of their own model: a nested object
+        is set as an already resolved foreign key, and a list of nested
+        objects as a list of mappers.
+
+        Example:
+            >>> netbox_mapper.__app_name__ = "dcim"
+            >>> netbox_mapper.__model__ = "devices"
+            >>> netbox_mapper.graphql(
+            ...     "{ device_list { id name interfaces {"
+            ...     "     id name ip_addresses { id address vrf { id } }"
+            ...     " } } }",
+            ...     models={
+            ...         "interfaces": ("dcim", "interfaces"),
+            ...         "ip_addresses": ("ipam", "ip-addresses"),
+            ...         "vrf": ("ipam", "vrfs"),
+            ...     }
+            ... )
+
+        As they only contain the requested fields, mappers are partial.
+        Lists of nested objects are not serialized by `to_dict()`.
+
+        :param variables: dict of the variables used by the query
+        :param models: dict of `(app name, model)` of nested objects, by
+            field name. Nested objects of other fields are kept as received.
+        """
+        data = self.netbox_api.graphql(query, variables)
+        yield from self._iterate_over_graphql_mappers(data, models or {})
+
+    def _iterate_over_graphql_mappers(self, data, models):
+        """
+        Build mappers from the objects of each field of a graphql answer
+        """
+        for objects in data.values():
+            if not isinstance(objects, list):
+                objects = [] if objects is None else [objects]
+            for obj in objects:
+                if isinstance(obj, dict) and "id" in obj:
+                    yield self._build_graphql_mapper(obj, models)
+                else:
+                    yield obj
+
+    def _build_graphql_mapper(self, obj, models):
+        """
+        Build a mapper from an object received by a graphql query, and
+        mappers from its nested objects of the fields in `models`
+        """
+        mapper_attributes = {}
+        foreign_objects = {}
+        related_objects = {}
+        for attr, val in obj.items():
+            if attr not in models:
+                mapper_attributes[attr] = val
+            elif isinstance(val, dict) and "id" in val:
+                fk = self._build_graphql_child_mapper(
+                    models[attr], val, models
+                )
+                foreign_objects[attr] = fk
+                mapper_attributes[attr] = {
+                    "id": fk.id, "url": "{}/{}".format(
+                        self.netbox_api.url.rstrip("/"), fk._route
+                    )
+                }
+            elif isinstance(val, list):
+                related_objects[attr] = [
+                    self._build_graphql_child_mapper(models[attr], v, models)
+                    if isinstance(v, dict) and "id" in v else v
+                    for v in val
+                ]
+            else:
+                mapper_attributes[attr] = val
+
+        mapper_attributes["id"] = _parse_graphql_id(obj["id"])
+        mapper = self._build_new_mapper_from(
+            mapper_attributes,
+            self._build_new_mapper_route(self._route, mapper_attributes),
+            partial=True
+        )
+        mapper._fk_cache.update(foreign_objects)
+        for attr, val in related_objects.items():
+            setattr(mapper, attr, val)
+
+        return mapper
+
+    def _build_graphql_child_mapper(self, app_name_and_model, obj, models):
+        app_name, model = app_name_and_model
+        return self._mapper_base_class()(
+            self.netbox_api, app_name, model
+        )._build_graphql_mapper(obj, models)
+
+    def export(
+            self, *args, fmt="jsonl", fields=None, out=None,
+            foreign_keys="id", limit=1000, **kwargs
+    ):
+        """
+        Export netbox objects to a JSON Lines or CSV stream
+
+        Takes the same filters as `get()`. Pages are decoded while they are
+        received and objects are written one by one as flat json, without
+        building any mapper, so the memory used does not depend on the
+        number of objects.
+
+        Foreign keys, and lists of them, are replaced by their id or name,
+        and choices by their value. In CSV, lists are joined with commas and
+        other nested objects are written as json.
+
+        Example:
+            >>> netbox_mapper.__app_name__ = "dcim"
+            >>> netbox_mapper.__model__ = "devices"
+            >>> with open("devices.csv", "w", newline="") as f:
+            ...     netbox_mapper.export(
+            ...         fmt="csv", fields=["id", "name", "site"], out=f,
+            ...         foreign_keys="name", site_id=1
+            ...     )
+            42
+
+        :param fmt: "jsonl" or "csv"
+        :param fields: list of fields to export, instead of all of them. In
+            CSV, defaults to the fields of the first object.
+        :param out: text stream to write to, defaults to stdout
+        :param foreign_keys: "id" or "name", to replace foreign keys by
+        :param limit: number of objects requested per page
+        :returns: number of objects exported
+        """
+        writer = self._build_export_writer(fmt, out, fields, foreign_keys)
+        kwargs.setdefault("limit", limit)
+        self._replace_params_mappers_by_id(kwargs)
+
+        nb_objects = 0
+        for obj in self._iterate_over_get_query(
+                self._build_get_route(args), kwargs, stream=True
+        ):
+            writer.write(_flatten_object(obj, fields, foreign_keys))
+            nb_objects += 1
+
+        writer.close()
+        return nb_objects
+
+    def _build_export_writer(self, fmt, out, fields, foreign_keys):
+        if foreign_keys not in ("id", "name"):
+            raise ValueError('foreign_keys must be "id" or "name"')
+
+        try:
+            writer_class = _export_writers[fmt]
+        except KeyError:
+            raise ValueError("Unknown export format: {}".format(fmt))
+
+        return writer_class(out or sys.stdout, fields)
+
+    def count(self, *args, **kwargs):
+        """
+        Count netbox objects matching filters, without getting them
+
+        Takes the same filters as `get()`, but only does one request for
+        a single brief object and reads the number of objects from the
+        answer.
+
+        Example:
+            >>> netbox_mapper.__app_name__ = "dcim"
+            >>> netbox_mapper.__model__ = "devices"
+            >>> netbox_mapper.count(site=site_mapper)
+
+        :returns: number of objects
+        """
+        return self.netbox_api.get(
+            self._build_get_route(args),
+            params=self._build_count_params(kwargs)
+        )["count"]
+
+    def exists(self, *args, **kwargs):
+        """
+        Check if any netbox object matches filters, without getting it
+
+        See `count()`.
+        """
+        return self.count(*args, **kwargs) > 0
+
+    def _build_count_params(self, params):
+        params = dict(params, limit=1, brief="true")
+        params.pop("offset", None)
+        self._replace_params_mappers_by_id(params)
+        return params
+
+    def _build_projection_params(self, params, brief=False, fields=None):
+        if brief:
+            params["brief"] = "true"
+        if fields:
+            params["fields"] = ",".join(fields)
+
+    def _build_get_route(self, args):
         if args:
-            route = self._route + "/".join(str(a) for a in args) + "/"
+            return self._route + "/".join(str(a) for a in args) + "/"
+        else:
+            return self._route
+
+    def _build_new_mapper_route(self, route, new_mapper_props):
+        """
+        :returns: route of the mapper to build from an object received on
+            `route`
+        """
+        if getattr(self, "id", None) is not None:
+            return route
         else:
-            route = self._route
+            return self._route + "{}/".format(new_mapper_props["id"])
 
-        new_mappers_props = self._iterate_over_get_query(route, kwargs)
+    def _iterate_over_new_mappers(
+            self, route, new_mappers_props, partial=False
+    ):
+        """
+        Build mappers from objects received by a get query
+
+        :param partial: if the objects are brief or projected
+        """
         for nm_prop in new_mappers_props:
             try:
-                if getattr(self, "id", None) is not None:
-                    new_mapper_route = route
-                else:
-                    new_mapper_route = self._route + "{}/".format(
-                        nm_prop["id"]
-                    )
-
-                yield self._build_new_mapper_from(nm_prop, new_mapper_route)
+                yield self._build_new_mapper_from(
+                    nm_prop, self._build_new_mapper_route(route, nm_prop),
+                    partial=partial
+                )
             except (KeyError, TypeError):
                 # Result objects have no id, cannot build a mapper from them,
                 # yield them as received
@@ -82,6 +384,134 @@ class NetboxMapper():
                 yield from new_mappers_props
                 return
 
+    def _iterate_over_new_records(
+            self, new_records_props, fields=None, partial=False
+    ):
+        """
+        Build records from objects received by a get query
+
+        :param fields: fields to keep in the records, or None to keep all
+            received fields
+        :param partial: if the records miss some fields of the objects
+        """
+        for nr_prop in new_records_props:
+            yield self._build_new_record(nr_prop, fields, partial)
+
+    def _build_new_record(self, new_record_props, fields=None, partial=False):
+        if not isinstance(new_record_props, dict):
+            return new_record_props
+
+        record_fields = fields or tuple(new_record_props)
+        record_class = _get_record_class(
+            self.__app_name__, self.__model__, record_fields, partial
+        )
+        return record_class._make(
+            new_record_props.get(f) for f in record_fields
+        )
+
+    def mapper_from_record(self, record):
+        """
+        Build a mapper from a record yielded by `get(as_records=True)`
+
+        No request is done, the mapper only contains the fields of the
+        record. Mappers built from records keeping only some fields are
+        partial.
+        """
+        new_mapper_props = dict(zip(record.__fields__, record))
+        return self._build_new_mapper_from(
+            new_mapper_props,
+            self._build_new_mapper_route(self._route, new_mapper_props),
+            partial=record.__partial__
+        )
+
+    def _prefetch_foreign_keys(self, mappers, foreign_keys, batch_size):
+        """
+        Resolve foreign keys of mappers by batches
+
+        Mappers are yielded as received, once the foreign keys of their batch
+        have been fetched and put in cache.
+        """
+        batch = []
+        for mapper in mappers:
+            batch.append(mapper)
+            if len(batch) >= batch_size:
+                self._resolve_foreign_keys(batch, foreign_keys)
+                yield from batch
+                batch = []
+
+        if batch:
+            self._resolve_foreign_keys(batch, foreign_keys)
+            yield from batch
+
+    def _resolve_foreign_keys(self, mappers, foreign_keys):
+        """
+        Fetch the foreign keys of multiple mappers with grouped requests
+
+        Distinct ids of a same related model are requested together by
+        using an `id` filter, then each foreign object is put in the cache
+        of the mappers referencing it.
+        """
+        ids_by_model, references = self._list_foreign_keys_to_resolve(
+            mappers, foreign_keys
+        )
+
+        foreign_objects = {}
+        for (app_name, model), ids in ids_by_model.items():
+            fk_mapper = self._mapper_base_class()(
+                self.netbox_api, app_name, model
+            )
+            for chunk in self._chunk_prefetch_ids(ids):
+                for fk in fk_mapper.get(id=chunk, limit=len(chunk)):
+                    foreign_objects[(app_name, model, fk.id)] = fk
+
+        self._cache_resolved_foreign_keys(references, foreign_objects)
+
+    def _list_foreign_keys_to_resolve(self, mappers, foreign_keys):
+        """
+        :returns: ids to fetch by related model, and the list of
+            `(mapper, attr, (app_name, model, id))` references to fill
+        """
+        ids_by_model = collections.defaultdict(set)
+        references = []
+        for mapper in mappers:
+            if not isinstance(mapper, NetboxMapper):
+                continue
+
+            for attr in foreign_keys:
+                if attr not in mapper.__original_foreign_keys_url__:
+                    continue
+
+                cached = mapper._get_cached_foreign_object(attr, _MISSING)
+                if cached is not _MISSING:
+                    continue
+
+                app_name, model, params = self._split_foreign_key_url(
+                    mapper.__original_foreign_keys_url__[attr]
+                )
+                if len(params) != 1:
+                    # not a standard object url, will be lazily fetched
+                    continue
+
+                fk_id = mapper.__original_foreign_keys_id__[attr]
+                ids_by_model[(app_name, model)].add(fk_id)
+                references.append((mapper, attr, (app_name, model, fk_id)))
+
+        return ids_by_model, references
+
+    def _chunk_prefetch_ids(self, ids):
+        ids = sorted(ids)
+        for i in range(0, len(ids), _PREFETCH_MAX_IDS):
+            yield ids[i:i + _PREFETCH_MAX_IDS]
+
+    def _cache_resolved_foreign_keys(self, references, foreign_objects):
+        for mapper, attr, key in references:
+            if key in foreign_objects:
+                fk = foreign_objects[key]
+                mapper._cache_foreign_object(attr, fk)
+                # also pin it in the mapper, as a shared cache smaller than
+                # the batch would evict it before it is read
+                mapper._fk_cache[attr] = fk
+
     def _replace_params_mappers_by_id(self, params):
         """
         Find mappers in a dict and replace them by their id
@@ -95,30 +525,141 @@ class NetboxMapper():
                 except AttributeError:
                     raise ValueError("Mapper {} has no id".format(k))
 
-    def _iterate_over_get_query(self, route, params):
+    def _iterate_over_get_query(
+            self, route, params, max_workers=None, keyset=False, stream=False
+    ):
         """
         Iterate over a get query and handle possible pagination
+
+        Pages are requested by following the `next` url sent by netbox, so
+        the page size it applies is respected.
+
+        :param max_workers: fetch pages following the first one concurrently
+            with this number of threads
+        :param keyset: request pages by filtering on the last received id
+        :param stream: decode pages while they are received
         """
+        if max_workers and (keyset or stream):
+            raise ValueError(
+                "max_workers cannot be used with keyset or stream"
+            )
+        elif keyset:
+            params = self._build_keyset_params(params)
+
+        iterate_over_page = (
+            self._iterate_over_streamed_page if stream
+            else self._iterate_over_page
+        )
         while True:
-            response = self.netbox_api.get(route, params=params)
-            if "results" in response:
-                new_mappers_props = response["results"]
-            else:
-                if isinstance(response, list):
-                    yield from response
-                else:
-                    yield response
+            response, last = yield from iterate_over_page(route, params)
+            if response is None:
+                return
+
+            next_params = self._build_next_page_params(
+                params, response, last, keyset
+            )
+            if next_params is None:
+                return
+            elif max_workers:
+                yield from self._iterate_over_pages_concurrently(
+                    route, next_params, response["count"], max_workers
+                )
                 return
 
-            yield from new_mappers_props
+            params = next_params
 
-            next_url = response.get("next")
-            if next_url:
-                params["offset"] = params.get("offset", 0) + params["limit"]
+    def _iterate_over_page(self, route, params):
+        """
+        Yield the objects of a page
+
+        :returns: the page answer, or None if it is not paginated, and the
+            last object of the page
+        """
+        response = self.netbox_api.get(route, params=params)
+        if "results" not in response:
+            if isinstance(response, list):
+                yield from response
             else:
-                return
+                yield response
+            return None, None
+
+        yield from response["results"]
+        return response, next(reversed(response["results"]), None)
+
+    def _iterate_over_streamed_page(self, route, params):
+        """
+        Same as `_iterate_over_page()`, but decode the page while it is
+        received
+        """
+        objects = self.netbox_api.iter_get(route, params=params)
+        last = None
+        while True:
+            try:
+                obj = next(objects)
+            except StopIteration as e:
+                return e.value, last
 
-    def post(self, **json):
+            last = obj
+            yield obj
+
+    def _build_keyset_params(self, params):
+        params = dict(params, ordering="id")
+        params.pop("offset", None)
+        return params
+
+    def _build_next_page_params(self, params, response, last, keyset=False):
+        """
+        :param last: last object received in `response`
+        :returns: parameters to request the page following `response`, or
+            None if it was the last one
+        """
+        if not response.get("next") or last is None:
+            return None
+        elif keyset:
+            return dict(params, id__gt=last["id"])
+
+        return _build_next_url_params(params, response["next"])
+
+    def _iterate_over_pages_concurrently(
+            self, route, params, count, max_workers
+    ):
+        """
+        Fetch all pages from the one of `params` by using a pool of threads
+
+        Pages are requested by their offset, as the total number of objects
+        is known from the first page. The number of pages in flight is
+        bounded, and results are yielded in order.
+        """
+        limit = int(params["limit"])
+        offsets = iter(range(int(params.get("offset", 0)), count, limit))
+
+        def fetch_page(offset):
+            page_params = params.copy()
+            page_params["offset"] = offset
+            return self.netbox_api.get(route, params=page_params)
+
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers)
+        pending = collections.deque()
+        try:
+            for offset in offsets:
+                pending.append(executor.submit(fetch_page, offset))
+                if len(pending) >= max_workers * 2:
+                    break
+
+            while pending:
+                response = pending.popleft().result()
+                for offset in offsets:
+                    pending.append(executor.submit(fetch_page, offset))
+                    break
+
+                yield from response.get("results", [])
+        finally:
+            # do not wait for the pages not requested yet if stopped early
+            for future in pending:
+                future.cancel()
+            executor.shutdown()
+
+    def post(self, refetch=None, **json):
         """
         Post a new netbox object
 
@@ -133,10 +674,19 @@ class NetboxMapper():
             ...                    name="example")
             <child_mapper>
 
+        :param refetch: if True, fetch the created object instead of building
+            the mapper from the POST answer. Defaults to
+            `self.refetch_after_post`.
         :returns: child_mapper: Mapper containing the created object
         """
         self._replace_params_mappers_by_id(json)
         new_mapper_dict = self.netbox_api.post(self._route, json=json)
+        new_mapper_route = self._route + "{}/".format(new_mapper_dict["id"])
+        if not self._should_refetch_after_post(refetch):
+            return self._build_new_mapper_from(
+                new_mapper_dict, new_mapper_route
+            )
+
         try:
             return next(self.get(new_mapper_dict["id"]))
         except requests.exceptions.HTTPError as e:
@@ -150,11 +700,12 @@ class NetboxMapper():
                     "Do not try to put this mapper as it will fail."
                 )
                 return self._build_new_mapper_from(
-                    new_mapper_dict,
-                    self._route + "{}/".format(new_mapper_dict["id"]),
-                    passive_mapper=True
+                    new_mapper_dict, new_mapper_route, passive_mapper=True
                 )
 
+    def _should_refetch_after_post(self, refetch=None):
+        return self.refetch_after_post if refetch is None else refetch
+
     def put(self):
         """
         Update an already existing netbox object
@@ -173,13 +724,193 @@ class NetboxMapper():
                                    response
         """
         assert getattr(self, "id", None) is not None, "self.id does not exist"
+        if self.__partial__:
+            raise PartialMapperError()
+
+        serialized = self.to_dict()
+        response = self.netbox_api.put(self._route, json=serialized)
+        self.__upstream_state__ = copy.deepcopy(serialized)
+        return response
+
+    def save(self):
+        """
+        Update an already existing netbox object with only what changed
+
+        Attributes and foreign keys that changed since the object has been
+        received are sent through a PATCH request. No request is done if
+        nothing changed.
+
+        Example:
+            >>> netbox_mapper.__app_name__ = "dcim"
+            >>> netbox_mapper.__model__ = "console-ports"
+            >>> child_mapper = netbox_mapper.get(1)
+            >>> child_mapper.name = "another name"
+            >>> child_mapper.save()
+
+            Will do a PATCH request with `{"name": "another name"}`
+
+        :returns: updated_object: updated object, as an unpacked json, or None
+            if nothing changed
+        """
+        assert getattr(self, "id", None) is not None, "self.id does not exist"
+
+        changes = self.get_changes()
+        if not changes:
+            return None
 
-        return self.netbox_api.put(self._route, json=self.to_dict())
+        response = self.netbox_api.patch(self._route, json=changes)
+        self._mark_changes_as_saved(changes)
+        return response
+
+    def get_changes(self):
+        """
+        :returns: serialized attributes and foreign keys that changed since
+            the object has been received from netbox, as `to_dict()` would
+            serialize them
+        """
+        serialized = self.to_dict()
+        if self.__upstream_state__ is None:
+            return serialized
+
+        return {
+            k: v for k, v in serialized.items()
+            if self.__upstream_state__.get(k, _MISSING) != v
+        }
+
+    def _mark_changes_as_saved(self, changes):
+        if self.__upstream_state__ is None:
+            self.__upstream_state__ = {}
+        self.__upstream_state__.update(copy.deepcopy(changes))
+
+    def bulk_create(self, objects, batch_size=50):
+        """
+        Create multiple netbox objects, with one request per batch
+
+        Example:
+            >>> netbox_mapper.__app_name__ = "dcim"
+            >>> netbox_mapper.__model__ = "sites"
+            >>> netbox_mapper.bulk_create([
+            ...     {"name": "A site", "slug": "a_site"},
+            ...     {"name": "Another site", "slug": "another_site"},
+            ... ])
+            [<child_mapper>, <child_mapper>]
+
+        :param objects: iterable of dicts, each one containing the attributes
+            of an object to create. Mappers are replaced by their id.
+        :param batch_size: maximum number of objects sent per request
+        :returns: child_mappers: list of mappers of the created objects
+        """
+        route = self._build_bulk_route()
+        new_mappers = []
+        for batch in self._iterate_over_bulk_create_batches(
+                objects, batch_size
+        ):
+            new_mappers.extend(self._iterate_over_bulk_response(
+                self.netbox_api.post(route, json=batch)
+            ))
+
+        return new_mappers
+
+    def bulk_update(self, mappers, batch_size=50):
+        """
+        Update multiple netbox objects, with one request per batch
+
+        Send the attributes of each mapper, as `put()` would, through a PATCH
+        request on the model endpoint.
+
+        Example:
+            >>> netbox_mapper.__app_name__ = "dcim"
+            >>> netbox_mapper.__model__ = "sites"
+            >>> sites = list(netbox_mapper.get())
+            >>> for site in sites:
+            ...     site.description = "some description"
+            >>> netbox_mapper.bulk_update(sites)
+
+        :param mappers: iterable of child mappers to update upstream
+        :param batch_size: maximum number of objects sent per request
+        :returns: updated_objects: list of updated objects, as unpacked json
+        """
+        route = self._build_bulk_route()
+        updated = []
+        for batch, serialized in self._iterate_over_bulk_update_batches(
+                mappers, batch_size
+        ):
+            updated.extend(self.netbox_api.patch(route, json=serialized))
+            self._mark_bulk_changes_as_saved(batch, serialized)
+
+        return updated
+
+    def bulk_delete(self, ids, batch_size=50):
+        """
+        Delete multiple netbox objects, with one request per batch
+
+        Example:
+            >>> netbox_mapper.__app_name__ = "dcim"
+            >>> netbox_mapper.__model__ = "sites"
+            >>> netbox_mapper.bulk_delete([1, 2, 3])
+
+        :param ids: iterable of ids or child mappers to delete
+        :param batch_size: maximum number of objects sent per request
+        :returns: req_answers: list of requests objects containing the netbox
+            responses, one per batch
+        """
+        route = self._build_bulk_route()
+        return [
+            self.netbox_api.delete(route, json=batch)
+            for batch in self._iterate_over_bulk_delete_batches(
+                ids, batch_size
+            )
+        ]
+
+    def _build_bulk_route(self):
+        if getattr(self, "id", None) is not None:
+            raise ForbiddenAsChildError(
+                "Bulk operations are only possible from a root mapper"
+            )
+
+        return self._route
+
+    def _iterate_over_bulk_create_batches(self, objects, batch_size):
+        for batch in _chunks(objects, batch_size):
+            batch = [obj.copy() for obj in batch]
+            for obj in batch:
+                self._replace_params_mappers_by_id(obj)
+            yield batch
+
+    def _iterate_over_bulk_update_batches(self, mappers, batch_size):
+        for batch in _chunks(mappers, batch_size):
+            for mapper in batch:
+                assert getattr(mapper, "id", None) is not None, (
+                    "mapper.id does not exist"
+                )
+                if mapper.__partial__:
+                    raise PartialMapperError()
+            yield batch, [mapper.to_dict() for mapper in batch]
+
+    def _mark_bulk_changes_as_saved(self, mappers, serialized):
+        for mapper, changes in zip(mappers, serialized):
+            mapper._mark_changes_as_saved(changes)
+
+    def _iterate_over_bulk_delete_batches(self, ids, batch_size):
+        for batch in _chunks(ids, batch_size):
+            batch_ids = dict(enumerate(batch))
+            self._replace_params_mappers_by_id(batch_ids)
+            yield [{"id": i} for i in batch_ids.values()]
+
+    def _iterate_over_bulk_response(self, response):
+        """
+        Build mappers from objects received after a bulk creation
+        """
+        for new_mapper_props in response:
+            yield self._build_new_mapper_from(
+                new_mapper_props,
+                self._route + "{}/".format(new_mapper_props["id"])
+            )
 
     def to_dict(self):
         serialize = {}
         foreign_keys = self.__foreign_keys__.copy()
-        exclude = ("created", "last_updated")
+        exclude = _NOT_SERIALIZED
         for a in self.__upstream_attrs__:
             if a in exclude:
                 continue
@@ -229,6 +960,9 @@ class NetboxMapper():
             itself. In this case, specifying an ID will conflict and raise a
             ForbiddenAsChildError
         """
+        return self.netbox_api.delete(self._build_delete_route(id))
+
+    def _build_delete_route(self, id=None):
         if id is not None and getattr(self, "id", None) is not None:
             raise ForbiddenAsChildError(
                 "Cannot specify an ID to delete when self is a mapper child "
@@ -237,8 +971,7 @@ class NetboxMapper():
         elif id is None and getattr(self, "id", None) is None:
             raise ValueError("Delete needs an id when self.id does not exist")
 
-        delete_route = self._route + "{}/".format(id) if id else self._route
-        return self.netbox_api.delete(delete_route)
+        return self._route + "{}/".format(id) if id else self._route
 
     def options(self):
         """
@@ -253,81 +986,161 @@ class NetboxMapper():
         """
         return self.netbox_api.options(self._route)
 
+    def get_schema(self):
+        """
+        Get the schema of the model, with its writable fields and the
+        choices of its fields
+
+        It is requested once if the api has a `schema_cache`.
+
+        :returns: `ModelSchema` of the model
+        """
+        return self.netbox_api.get_schema(self.__app_name__, self.__model__)
+
+    def validate(self):
+        """
+        Check this object against the schema of its model, without sending
+        it
+
+        Missing required fields are not reported for partial mappers.
+
+        :raises ValidationError: with the errors by field
+        """
+        self.get_schema().validate(self.to_dict(), partial=self.__partial__)
+
+    def _mapper_base_class(self, passive_mapper=False):
+        """
+        :returns: class used as base for the mappers built by this one
+        """
+        return NetboxPassiveMapper if passive_mapper else NetboxMapper
 
     def _build_new_mapper_from(
-            self, mapper_attributes, new_route, passive_mapper=False
+            self, mapper_attributes, new_route, passive_mapper=False,
+            partial=False
     ):
-        cls = NetboxPassiveMapper if passive_mapper else NetboxMapper
-        mapper_class = type(
-            "NetboxMapper_{}_{}".format(
-                re.sub("_|-", "", self.__model__.title()),
-                re.sub("_|-", "", "".join(
-                    s.title() for s in new_route.split("/")
-                ))
-            ), (cls,), {}
+        cls = self._mapper_base_class(passive_mapper)
+        foreign_keys = tuple(
+            attr for attr, val in mapper_attributes.items()
+            if _is_foreign_key(val)
+        )
+        mapper_class = _get_mapper_class(
+            cls, self.__app_name__, self.__model__, foreign_keys
         )
 
         mapper = mapper_class(
             self.netbox_api, self.__app_name__, self.__model__, new_route
         )
-        mapper.__upstream_attrs__ = []
-        mapper.__foreign_keys__ = []
+        mapper.__partial__ = partial
+        # serialized state, as to_dict() would build it, computed from the
+        # received attributes to avoid serializing and deep copying the
+        # mapper itself
+        upstream_state = {}
         for attr, val in mapper_attributes.items():
-            if isinstance(val, dict) and "id" in val and "url" in val:
+            if _is_foreign_key(val):
                 mapper.__foreign_keys__.append(attr)
                 mapper.__original_foreign_keys_id__[attr] = val["id"]
                 mapper._set_property_foreign_key(attr, val)
+                upstream_state[attr] = val["id"]
             else:
                 mapper.__upstream_attrs__.append(attr)
                 setattr(mapper, attr, val)
+                if attr in _NOT_SERIALIZED:
+                    continue
+                elif isinstance(val, (dict, list)):
+                    val = _serialize_upstream_value(val)
+                upstream_state[attr] = val
 
+        mapper.__upstream_state__ = upstream_state
         return mapper
 
     def _set_property_foreign_key(self, attr, value):
-        def get_foreign_object(*args):
-            if hasattr(self, "_{}".format(attr)):
-                return getattr(self, "_{}".format(attr))
+        """
+        Link the foreign key `attr` of this mapper to its upstream object
 
-            if attr in self._fk_cache:
-                return self._fk_cache[attr]
+        The property itself is shared by all mappers of the same class, it
+        resolves the foreign object by using the url stored in this instance.
+        """
+        self.__original_foreign_keys_url__[attr] = value["url"]
+        try:
+            self._fk_cache.pop(attr)
+        except KeyError:
+            pass
 
-            url = value["url"]
-            route = url.replace(self.netbox_api.url, "", 1).lstrip("/")
-            model, app_name, *params = route.split("/")
+    def _get_foreign_object(self, attr):
+        if hasattr(self, "_{}".format(attr)):
+            return getattr(self, "_{}".format(attr))
 
-            fk = list(NetboxMapper(self.netbox_api, model, app_name).get(
-                *[p for p in params if p]
-            ))
-            if not fk:
-                fk = None
-            elif len(fk) == 1:
-                fk = fk[0]
+        fk = self._get_cached_foreign_object(attr, _MISSING)
+        if fk is _MISSING:
+            fk = self._fetch_foreign_object(
+                self.__original_foreign_keys_url__[attr]
+            )
+            self._cache_foreign_object(attr, fk)
 
-            self._fk_cache[attr] = fk
-            return fk
+        return fk
 
-        def setter(cls, value):
-            setattr(self, "_{}".format(attr), value)
+    def _get_cached_foreign_object(self, attr, default=None):
+        """
+        Get a foreign object from the mapper cache or the shared api cache
+        """
+        if attr in self._fk_cache:
+            return self._fk_cache[attr]
 
-        def getter_fk_id(*args):
-            original_id_condition = (
-                not hasattr(self, "_{}".format(attr)) and
-                attr in self.__original_foreign_keys_id__
+        shared_cache = getattr(self.netbox_api, "fk_cache", None)
+        if shared_cache is not None:
+            return shared_cache.get(
+                self.__original_foreign_keys_url__[attr], default
             )
 
-            if original_id_condition:
-                return self.__original_foreign_keys_id__[attr]
-            else:
-                return self._get_foreign_object_id(getattr(self, attr))
+        return default
 
-        try:
-            self._fk_cache.pop(attr)
-        except KeyError:
-            pass
-        setattr(type(self), attr, property(get_foreign_object, setter))
-        setattr(
-            type(self), "_{}_id".format(attr), property(getter_fk_id)
-        )
+    def _cache_foreign_object(self, attr, fk):
+        """
+        Cache a foreign object, in the api cache if it is shared between
+        mappers, or in this mapper cache otherwise
+        """
+        shared_cache = getattr(self.netbox_api, "fk_cache", None)
+        if shared_cache is not None:
+            shared_cache.set(self.__original_foreign_keys_url__[attr], fk)
+        else:
+            self._fk_cache[attr] = fk
+
+    def _fetch_foreign_object(self, url):
+        app_name, model, params = self._split_foreign_key_url(url)
+        fk = list(self._mapper_base_class()(
+            self.netbox_api, app_name, model
+        ).get(*params))
+        return self._unpack_foreign_object(fk)
+
+    def _unpack_foreign_object(self, fk):
+        """
+        :param fk: list of objects received when fetching a foreign key
+        :returns: the foreign object if only one is received, None if there
+            is none, or the list otherwise
+        """
+        if not fk:
+            return None
+        elif len(fk) == 1:
+            return fk[0]
+
+        return fk
+
+    def _split_foreign_key_url(self, url):
+        """
+        :returns: app name, model and the remaining route items of a foreign
+            object url
+        """
+        route = url.replace(self.netbox_api.url, "", 1).lstrip("/")
+        app_name, model, *params = route.split("/")
+        return app_name, model, [p for p in params if p]
+
+    def _get_foreign_object_id_of(self, attr):
+        if hasattr(self, "_{}".format(attr)):
+            return self._get_foreign_object_id(
+                getattr(self, "_{}".format(attr))
+            )
+        else:
+            return self.__original_foreign_keys_id__.get(attr)
 
     def _get_foreign_object_id(self, fk_obj):
         if isinstance(fk_obj, int):
@@ -351,5 +1164,247 @@ class NetboxPassiveMapper(NetboxMapper):
     def put(self, *args, **kwargs):
         raise ForbiddenAsPassiveMapperError()
 
+    def save(self, *args, **kwargs):
+        raise ForbiddenAsPassiveMapperError()
+
     def delete(self, *args, **kwargs):
         raise ForbiddenAsPassiveMapperError()
+
+    def graphql(self, *args, **kwargs):
+        raise ForbiddenAsPassiveMapperError()
+
+    def export(self, *args, **kwargs):
+        raise ForbiddenAsPassiveMapperError()
+
+    def count(self, *args, **kwargs):
+        raise ForbiddenAsPassiveMapperError()
+
+    def exists(self, *args, **kwargs):
+        raise ForbiddenAsPassiveMapperError()
+
+    def bulk_create(self, *args, **kwargs):
+        raise ForbiddenAsPassiveMapperError()
+
+    def bulk_update(self, *args, **kwargs):
+        raise ForbiddenAsPassiveMapperError()
+
+    def bulk_delete(self, *args, **kwargs):
+        raise ForbiddenAsPassiveMapperError()
+
+
+#: classes of mappers built from netbox objects, by model and foreign keys
+_mapper_classes = {}
+
+
+def _chunks(iterable, size):
+    """
+    Split an iterable in lists of `size` items at most
+    """
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _flatten_object(obj, fields, foreign_keys):
+    """
+    Replace the foreign keys of an object by their id or name, and its
+    choices by their value
+
+    :param fields: fields to keep, or None to keep all of them
+    """
+    return {
+        field: _flatten_value(obj.get(field), foreign_keys)
+        for field in (fields or obj)
+    }
+
+
+def _flatten_value(value, foreign_keys):
+    if isinstance(value, list):
+        return [_flatten_value(v, foreign_keys) for v in value]
+    elif not isinstance(value, dict):
+        return value
+    elif "value" in value and "label" in value:
+        return value["value"]
+    elif "id" in value:
+        if foreign_keys == "name":
+            return value.get("name", value.get("display", value["id"]))
+        return value["id"]
+
+    return value
+
+
+class _JSONLinesWriter():
+    def __init__(self, out, fields=None):
+        self.out = out
+
+    def write(self, obj):
+        self.out.write(json.dumps(obj))
+        self.out.write("\n")
+
+    def close(self):
+        pass
+
+
+class _CSVWriter():
+    """
+    Write objects as CSV rows, with the fields of the first object as
+    header if no fields are given
+    """
+
+    def __init__(self, out, fields=None):
+        self.out = out
+        self.fields = fields
+
+        self._writer = None
+
+    def write(self, obj):
+        if self._writer is None:
+            self._init_writer(self.fields or list(obj))
+        self._writer.writerow(
+            {k: _format_csv_value(v) for k, v in obj.items()}
+        )
+
+    def close(self):
+        if self._writer is None and self.fields:
+            self._init_writer(self.fields)
+
+    def _init_writer(self, fields):
+        self._writer = csv.DictWriter(self.out, fields, extrasaction="ignore")
+        self._writer.writeheader()
+
+
+#: classes writing exported objects, by format
+_export_writers = {"jsonl": _JSONLinesWriter, "csv": _CSVWriter}
+
+
+def _format_csv_value(value):
+    if isinstance(value, list):
+        return ",".join(
+            json.dumps(v) if isinstance(v, (dict, list)) else str(v)
+            for v in value
+        )
+    elif isinstance(value, dict):
+        return json.dumps(value)
+
+    return value
+
+
+#: classes of records built from netbox objects, by model and fields
+_record_classes = {}
+
+
+def _get_record_class(app_name, model, fields, partial=False):
+    """
+    Get the record class for a model and a set of fields
+
+    Records are named tuples. As netbox field names are not always valid
+    python identifiers, the original names are kept in `__fields__`.
+
+    :param partial: if the records miss some fields of the objects, kept
+        in `__partial__`
+    """
+    key = (app_name, model, fields, partial)
+    try:
+        return _record_classes[key]
+    except KeyError:
+        pass
+
+    record_class = collections.namedtuple(
+        "NetboxRecord_{}_{}".format(
+            re.sub("_|-", "", model.title()),
+            re.sub("_|-", "", app_name.title())
+        ), fields, rename=True
+    )
+    record_class.__fields__ = fields
+    record_class.__partial__ = partial
+    _record_classes[key] = record_class
+    return record_class
+
+
+def _parse_graphql_id(graphql_id):
+    """
+    :returns: id of an object received by a graphql query, as an int if
+        possible, as graphql sends them as strings
+    """
+    try:
+        return int(graphql_id)
+    except (TypeError, ValueError):
+        return graphql_id
+
+
+def _serialize_upstream_value(value):
+    """
+    :returns: a received dict or list as `to_dict()` serializes it, copied
+        to not share it with the mapper
+    """
+    if isinstance(value, dict) and "value" in value and "label" in value:
+        return value["value"]
+    elif not value:
+        return type(value)()
+
+    return _copy_json(value)
+
+
+def _copy_json(value):
+    """
+    Copy an unpacked json, much faster than `copy.deepcopy()`
+    """
+    if isinstance(value, dict):
+        return {k: _copy_json(v) for k, v in value.items()}
+    elif isinstance(value, list):
+        return [_copy_json(v) for v in value]
+
+    return value
+
+
+def _is_foreign_key(value):
+    return isinstance(value, dict) and "id" in value and "url" in value
+
+
+def _get_mapper_class(cls, app_name, model, foreign_keys):
+    """
+    Get the mapper class for a model and a set of foreign keys
+
+    As foreign keys are properties, they cannot be set on NetboxMapper
+    directly. A subclass is built the first time a model is seen with these
+    foreign keys, and then reused for all its objects.
+    """
+    key = (cls, app_name, model, foreign_keys)
+    try:
+        return _mapper_classes[key]
+    except KeyError:
+        pass
+
+    namespace = {}
+    for attr in foreign_keys:
+        namespace[attr] = _foreign_key_property(attr)
+        namespace["_{}_id".format(attr)] = _foreign_key_id_property(attr)
+
+    mapper_class = type(
+        "NetboxMapper_{}_{}".format(
+            re.sub("_|-", "", model.title()),
+            re.sub("_|-", "", app_name.title())
+        ), (cls,), namespace
+    )
+    _mapper_classes[key] = mapper_class
+    return mapper_class
+
+
+def _foreign_key_property(attr):
+    def getter(self):
+        return self._get_foreign_object(attr)
+
+    def setter(self, value):
+        setattr(self, "_{}".format(attr), value)
+
+    return property(getter, setter)
+
+
+def _foreign_key_id_property(attr):
+    def getter(self):
+        return self._get_foreign_object_id_of(attr)
+
+    return property(getter)
@@ -0,0 +1,92 @@
+import collections
+import threading
+
+from .api import _get_model_route
+
+
+class RequestMetrics():
+    """
+    Aggregate requests done by a `NetboxAPI`, by method and model route
+
+    To register it on an api, add it to its `after_request_hooks`:
+
+        >>> metrics = RequestMetrics()
+        >>> netbox_api.after_request_hooks.append(metrics)
+        >>> list(NetboxMapper(netbox_api, "dcim", "devices").get())
+        >>> metrics.report()
+        {("get", "dcim/devices"): {"count": 3, …}, …}
+
+    :param max_samples: number of most recent latencies kept per route to
+        compute the percentiles
+    """
+
+    def __init__(self, max_samples=10000):
+        self.max_samples = max_samples
+
+        self._lock = threading.Lock()
+        self._routes = {}
+
+    def __call__(self, event):
+        key = (event.method, _get_model_route(event.route))
+        with self._lock:
+            try:
+                route_metrics = self._routes[key]
+            except KeyError:
+                route_metrics = self._routes[key] = _RouteMetrics(
+                    self.max_samples
+                )
+            route_metrics.add(event)
+
+    def report(self):
+        """
+        :returns: dict of metrics by `(method, model route)`: number of
+            requests, errors and retries, bytes received, and latency
+            percentiles in seconds
+        """
+        with self._lock:
+            return {
+                key: route_metrics.report()
+                for key, route_metrics in self._routes.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+
+
+class _RouteMetrics():
+    def __init__(self, max_samples):
+        self.count = 0
+        self.errors = 0
+        self.retries = 0
+        self.bytes = 0
+        self.total_time = 0
+        self.latencies = collections.deque(maxlen=max_samples)
+
+    def add(self, event):
+        self.count += 1
+        self.errors += event.error is not None
+        self.retries += event.retries
+        self.bytes += event.response_size or 0
+        self.total_time += event.elapsed
+        self.latencies.append(event.elapsed)
+
+    def report(self):
+        latencies = sorted(self.latencies)
+        return {
+            "count": self.count, "errors": self.errors,
+            "retries": self.retries, "bytes": self.bytes,
+            "total_time": self.total_time,
+            "p50": _percentile(latencies, 50),
+            "p90": _percentile(latencies, 90),
+            "p99": _percentile(latencies, 99),
+            "max": latencies[-1] if latencies else None,
+        }
+
+
+def _percentile(sorted_values, percent):
+    if not sorted_values:
+        return None
+
+    index = round(percent / 100 * (len(sorted_values) - 1))
+    return sorted_values[index]
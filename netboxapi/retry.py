@@ -0,0 +1,93 @@
+import email.utils
+import random
+import time
+
+
+class RetryPolicy():
+    """
+    Policy to retry requests failing because of a transient error
+
+    Requests are retried when the connection fails or when netbox answers
+    with one of the `status_codes`, only for the given `methods`, which
+    should be idempotent.
+
+    :param max_attempts: maximum number of attempts for a request, including
+        the first one
+    :param backoff_factor: number of seconds to wait before the first retry,
+        doubled for each following one
+    :param max_backoff: maximum number of seconds to wait between two
+        attempts
+    :param jitter: if True, randomize the backoff to avoid synchronized
+        retries from concurrent clients
+    :param status_codes: http status codes to retry
+    :param methods: http methods to retry
+    :param respect_retry_after: if True, wait for the delay asked by the
+        server in a `Retry-After` header, instead of the backoff
+    """
+
+    def __init__(
+            self, max_attempts=3, backoff_factor=0.5, max_backoff=60,
+            jitter=True, status_codes=(429, 502, 503, 504),
+            methods=("get", "head", "options", "put", "delete"),
+            respect_retry_after=True
+    ):
+        self.max_attempts = max_attempts
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.status_codes = frozenset(status_codes)
+        self.methods = frozenset(m.lower() for m in methods)
+        self.respect_retry_after = respect_retry_after
+
+    def should_retry(self, method, attempt, status_code=None):
+        """
+        :param method: http method of the failed request
+        :param attempt: number of attempts already done
+        :param status_code: status code received, or None if the connection
+            failed
+        """
+        if attempt >= self.max_attempts or method.lower() not in self.methods:
+            return False
+
+        return status_code is None or status_code in self.status_codes
+
+    def get_backoff(self, attempt, retry_after=None):
+        """
+        :param attempt: number of attempts already done
+        :param retry_after: value of the `Retry-After` header received, if
+            any
+        :returns: number of seconds to wait before the next attempt
+        """
+        if self.respect_retry_after and retry_after:
+            delay = _parse_retry_after(retry_after)
+            if delay is not None:
+                return min(delay, self.max_backoff)
+
+        delay = min(
+            self.backoff_factor * 2 ** (attempt - 1), self.max_backoff
+        )
+        if self.jitter:
+            delay = delay / 2 + random.uniform(0, delay / 2)
+
+        return delay
+
+
+def _parse_retry_after(retry_after):
+    """
+    :param retry_after: `Retry-After` header, as a number of seconds or an
+        http date
+    :returns: number of seconds to wait, or None if it cannot be parsed
+    """
+    try:
+        return max(float(retry_after), 0)
+    except ValueError:
+        pass
+
+    try:
+        retry_at = email.utils.parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        return None
+    if retry_at is None:
+        return None
+
+    return max(retry_at.timestamp() - time.time(), 0)
@@ -0,0 +1,163 @@
+"""
+Schemas of netbox models, built from their OPTIONS answer
+"""
+
+import json
+import os
+import shutil
+import threading
+
+from .cache import _hash, _write_json_atomically
+from .exceptions import ValidationError
+
+
+class ModelSchema():
+    """
+    Fields of a netbox model, as described by its OPTIONS answer
+
+    Lookup tables are computed once, to validate objects and translate
+    choices without any request.
+
+    :param options: OPTIONS answer of the model route, as an unpacked json
+    """
+
+    def __init__(self, options):
+        self.options = options
+
+        actions = options.get("actions") or {}
+        #: description of each field, by name
+        self.fields = actions.get("POST") or actions.get("PUT") or {}
+        #: fields that can be sent when creating or updating an object
+        self.writable_fields = frozenset(
+            f for f, desc in self.fields.items() if not desc.get("read_only")
+        )
+        #: fields needed to create an object
+        self.required_fields = frozenset(
+            f for f, desc in self.fields.items()
+            if desc.get("required") and not desc.get("read_only")
+        )
+        #: label of each value, by choice field
+        self.choices = {
+            f: {c["value"]: c["display_name"] for c in desc["choices"]}
+            for f, desc in self.fields.items() if "choices" in desc
+        }
+        #: value of each label, by choice field
+        self.choice_values = {
+            f: {label: value for value, label in labels.items()}
+            for f, labels in self.choices.items()
+        }
+
+    def get_label(self, field, value):
+        """
+        :returns: label of a value of a choice field
+        :raises KeyError: if the field has no such choice
+        """
+        return self.choices[field][value]
+
+    def get_value(self, field, label):
+        """
+        :returns: value of a label of a choice field
+        :raises KeyError: if the field has no such choice
+        """
+        return self.choice_values[field][label]
+
+    def validate(self, obj, partial=False):
+        """
+        Check an object before sending it to netbox
+
+        Unknown fields, values that are not one of the choices of a field,
+        and missing required fields are reported. Read-only fields are
+        accepted, as netbox ignores them.
+
+        :param obj: object to validate, as a dict
+        :param partial: if True, do not report missing required fields, as
+            for an update
+        :raises ValidationError: with the errors by field
+        """
+        errors = {}
+        for field, value in obj.items():
+            if self.fields and field not in self.fields:
+                errors[field] = "Unknown field."
+            elif field in self.choices and value is not None:
+                if isinstance(value, dict):
+                    value = value.get("value")
+                if value not in self.choices[field]:
+                    errors[field] = '"{}" is not a valid choice.'.format(
+                        value
+                    )
+
+        if not partial:
+            for field in self.required_fields - set(obj):
+                errors[field] = "This field is required."
+
+        if errors:
+            raise ValidationError(errors)
+
+
+class SchemaCache():
+    """
+    Cache of the schemas of netbox models
+
+    OPTIONS answers are kept in memory once received. If a directory is
+    set, they are also stored on disk, by netbox version, and are kept
+    between runs until netbox is upgraded.
+
+    :param directory: if set, directory where schemas are stored
+    """
+
+    def __init__(self, directory=None):
+        self.directory = directory
+
+        self._schemas = {}
+        self._lock = threading.Lock()
+
+    def get(self, route, version=None):
+        """
+        :param route: model route of the schema
+        :param version: netbox version, needed to read schemas on disk
+        :returns: the `ModelSchema` stored, or None
+        """
+        try:
+            return self._schemas[(version, route)]
+        except KeyError:
+            pass
+
+        if not self.directory or version is None:
+            return None
+
+        try:
+            with open(self._schema_path(route, version)) as f:
+                options = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        return self._set_in_memory(route, version, options)
+
+    def set(self, route, options, version=None):
+        """
+        :param options: OPTIONS answer of the model route
+        :returns: the `ModelSchema` built from `options`
+        """
+        if self.directory and version is not None:
+            self._write_schema(route, version, options)
+
+        return self._set_in_memory(route, version, options)
+
+    def clear(self):
+        with self._lock:
+            self._schemas.clear()
+        if self.directory:
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+    def _set_in_memory(self, route, version, options):
+        schema = ModelSchema(options)
+        with self._lock:
+            return self._schemas.setdefault((version, route), schema)
+
+    def _schema_path(self, route, version):
+        return os.path.join(
+            self.directory, _hash(str(version)), "{}.json".format(_hash(route))
+        )
+
+    def _write_schema(self, route, version, options):
+        _write_json_atomically(self._schema_path(route, version), options)
@@ -0,0 +1,455 @@
+"""
+Local copy of netbox models, to query them without any request
+"""
+
+import json
+import requests
+import sqlite3
+import threading
+import time
+import urllib.parse
+
+from .api import NetboxAPI
+from .exceptions import ReadOnlyAPIError
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS objects (
+    route TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    last_updated TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (route, id)
+);
+CREATE TABLE IF NOT EXISTS syncs (
+    route TEXT PRIMARY KEY,
+    last_updated TEXT,
+    synced_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+#: parameters of a get request that are not filters
+_NOT_FILTERS = ("limit", "offset", "ordering", "brief", "fields")
+
+
+#: value of the field of an object to compare with a filter, as a string,
+#: like `_get_filter_value()` does. Takes the json path of the field 4 times.
+_FILTER_VALUE_SQL = """CAST(CASE json_type(data, ?)
+    WHEN 'object' THEN COALESCE(
+        json_extract(data, ? || '.id'), json_extract(data, ? || '.value')
+    )
+    WHEN 'true' THEN 'true'
+    WHEN 'false' THEN 'false'
+    WHEN 'null' THEN 'None'
+    ELSE json_extract(data, ?)
+END AS TEXT)"""
+
+
+class NetboxSnapshot():
+    """
+    Local copy of netbox models, stored in a sqlite database
+
+    Models are copied with `sync()`, which only pulls objects updated since
+    the last synchronization. `get_api()` then returns an api reading the
+    copy, to use with mappers.
+
+    Example:
+        >>> snapshot = NetboxSnapshot("netbox.sqlite", netbox_api)
+        >>> snapshot.sync("dcim", "devices")
+        >>> snapshot_api = snapshot.get_api()
+        >>> devices = NetboxMapper(snapshot_api, "dcim", "devices").get()
+
+    :param path: path of the sqlite database
+    :param netbox_api: `NetboxAPI` to copy the models from. Only needed to
+        sync them.
+    """
+
+    def __init__(self, path, netbox_api=None):
+        self.path = path
+        self.netbox_api = netbox_api
+
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._db:
+            self._db.executescript(_SCHEMA)
+            if netbox_api is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO meta VALUES ('url', ?)",
+                    (netbox_api.url,)
+                )
+
+    @property
+    def url(self):
+        """
+        :returns: url of the netbox api copied
+        """
+        row = self._execute("SELECT value FROM meta WHERE key = 'url'")
+        return row[0][0] if row else None
+
+    def close(self):
+        self._db.close()
+
+    def sync(self, app_name, model, full=False, limit=1000):
+        """
+        Copy a netbox model, or update its copy
+
+        Only objects updated since the last synchronization are pulled, by
+        filtering on their `last_updated` date. Objects deleted upstream are
+        then removed if the number of objects differs.
+
+        The date to pull from next time is read before pulling, so objects
+        updated during the synchronization are pulled again next time.
+
+        :param full: if True, drop the current copy and pull all objects
+        :param limit: number of objects requested per page
+        :returns: number of objects pulled
+        """
+        route = self.netbox_api.build_model_route(app_name, model)
+        last_updated = None if full else self.get_last_updated(route)
+        if full:
+            self._execute("DELETE FROM objects WHERE route = ?", (route,))
+
+        params = {"limit": limit}
+        if last_updated:
+            params["last_updated__gte"] = last_updated
+        new_last_updated = self._get_upstream_last_updated(route, params)
+
+        nb_pulled = 0
+        for page in self._iterate_over_pages(route, params):
+            self._store_objects(route, page)
+            nb_pulled += len(page)
+
+        self._remove_deleted_objects(route, limit)
+        self._execute(
+            "INSERT OR REPLACE INTO syncs VALUES (?, ?, ?)", (
+                route, new_last_updated or last_updated, time.time()
+            )
+        )
+        return nb_pulled
+
+    def get_last_updated(self, route):
+        """
+        :returns: most recent `last_updated` date received for a model route
+            during the last synchronization, or None if it never has been
+            synchronized
+        """
+        rows = self._execute(
+            "SELECT last_updated FROM syncs WHERE route = ?", (route,)
+        )
+        return rows[0][0] if rows else None
+
+    def get_api(self):
+        """
+        :returns: read-only `NetboxSnapshotAPI` on this copy
+        """
+        return NetboxSnapshotAPI(self)
+
+    def count(self, route, ids=None, id_gt=None, filters=None):
+        """
+        :returns: number of objects copied for a model route, matching the
+            filters of `iterate_over_objects()`
+        """
+        query, args = self._build_objects_query(
+            "SELECT COUNT(*)", route, ids, id_gt, filters
+        )
+        return self._execute(query, args)[0][0]
+
+    def iterate_over_objects(
+            self, route, ids=None, id_gt=None, filters=None, limit=None,
+            offset=0
+    ):
+        """
+        Iterate over the objects copied for a model route, ordered by id
+
+        :param ids: only get objects with these ids
+        :param id_gt: only get objects with an id greater than this one
+        :param filters: dict of the values to filter on, by field. A value
+            matches a field if equal to it, or to its id or value for
+            foreign keys and choices. Values can be lists, to match any of
+            them.
+        :param limit: maximum number of objects to get
+        :param offset: number of objects to skip
+        """
+        query, args = self._build_objects_query(
+            "SELECT data", route, ids, id_gt, filters
+        )
+        query += " ORDER BY id LIMIT ? OFFSET ?"
+        args.extend((-1 if limit is None else limit, offset))
+
+        for (data,) in self._execute(query, args):
+            yield json.loads(data)
+
+    def get_fields(self, route):
+        """
+        :returns: set of the fields of the objects copied for a model route,
+            empty if none has been copied
+        """
+        rows = self._execute(
+            "SELECT data FROM objects WHERE route = ? LIMIT 1", (route,)
+        )
+        return set(json.loads(rows[0][0])) if rows else set()
+
+    def _build_objects_query(
+            self, select, route, ids=None, id_gt=None, filters=None
+    ):
+        """
+        :returns: query selecting the objects of a model route matching
+            filters, and its arguments
+        """
+        query = select + " FROM objects WHERE route = ?"
+        args = [route]
+        if ids is not None:
+            query += " AND id IN ({})".format(",".join("?" * len(ids)))
+            args.extend(ids)
+        if id_gt is not None:
+            query += " AND id > ?"
+            args.append(id_gt)
+
+        for field, expected in (filters or {}).items():
+            if not isinstance(expected, (list, tuple, set)):
+                expected = [expected]
+            query += " AND {} IN ({})".format(
+                _FILTER_VALUE_SQL, ",".join("?" * len(expected))
+            )
+            args.extend(["$.{}".format(json.dumps(field))] * 4)
+            args.extend(_get_filter_value(e) for e in expected)
+
+        return query, args
+
+    def _iterate_over_pages(self, route, params):
+        """
+        Iterate over the pages of a model route, ordered by id
+
+        Pages are requested from the last id received rather than by
+        offset, to not skip any object when others are updated or deleted
+        meanwhile.
+        """
+        params = dict(params, ordering="id")
+        while True:
+            response = self.netbox_api.get(route, params=params)
+            yield response["results"]
+
+            if not response.get("next") or not response["results"]:
+                return
+            params["id__gt"] = response["results"][-1]["id"]
+
+    def _store_objects(self, route, objects):
+        self._executemany(
+            "INSERT OR REPLACE INTO objects VALUES (?, ?, ?, ?)", (
+                (route, obj["id"], obj.get("last_updated"), json.dumps(obj))
+                for obj in objects
+            )
+        )
+
+    def _remove_deleted_objects(self, route, limit):
+        """
+        Compare the number of objects with netbox, and remove the ones not
+        existing upstream anymore if it differs
+        """
+        upstream_count = self.netbox_api.get(
+            route, params={"limit": 1, "brief": "true"}
+        )["count"]
+        if upstream_count == self.count(route):
+            return
+
+        upstream_ids = set()
+        params = {"limit": limit, "brief": "true"}
+        for page in self._iterate_over_pages(route, params):
+            upstream_ids.update(obj["id"] for obj in page)
+
+        local_ids = set(r[0] for r in self._execute(
+            "SELECT id FROM objects WHERE route = ?", (route,)
+        ))
+        self._executemany(
+            "DELETE FROM objects WHERE route = ? AND id = ?",
+            ((route, i) for i in local_ids - upstream_ids)
+        )
+
+    def _get_upstream_last_updated(self, route, params):
+        """
+        :returns: most recent `last_updated` date of the objects of a model
+            route matching `params` in netbox, or None if there is none
+        """
+        results = self.netbox_api.get(route, params=dict(
+            params, limit=1, ordering="-last_updated"
+        ))["results"]
+        return results[0].get("last_updated") if results else None
+
+    def _execute(self, query, args=()):
+        with self._lock, self._db:
+            return self._db.execute(query, args).fetchall()
+
+    def _executemany(self, query, args):
+        with self._lock, self._db:
+            self._db.executemany(query, args)
+
+
+class NetboxSnapshotAPI(NetboxAPI):
+    """
+    Read-only api on a `NetboxSnapshot`, without any request to netbox
+
+    Answers to GET requests are built like netbox would: routes of models
+    and objects are supported, paginated with `limit` and `offset`. Other
+    parameters are used as filters on the object fields, by comparing them
+    with the field value, or its id or value for foreign keys and choices.
+    Only `id`, `id__gt` and field names can be used as filters, others
+    raise a `ValueError`.
+    """
+
+    def __init__(self, snapshot, **kwargs):
+        super().__init__(snapshot.url or "http://localhost/api", **kwargs)
+        self.snapshot = snapshot
+
+    def get(self, route, params=None, **kwargs):
+        """
+        :returns results: answer, as an unpacked json
+        """
+        model_route, object_id = self._split_route(route)
+        params = params or {}
+        if object_id is not None:
+            return self._get_object(model_route, object_id)
+
+        filters = {k: v for k, v in params.items() if k not in _NOT_FILTERS}
+        self._check_filters(model_route, filters)
+        query_filters = {
+            "ids": self._get_ids_filter(filters),
+            "id_gt": self._get_id_gt_filter(filters),
+            "filters": filters,
+        }
+        offset = int(params.get("offset", 0))
+        limit = int(params.get("limit", 50))
+        count = self.snapshot.count(model_route, **query_filters)
+        next_offset = offset + limit
+        return {
+            "count": count,
+            "next": self._build_page_url(
+                route, params, next_offset
+            ) if next_offset < count else None,
+            "previous": self._build_page_url(
+                route, params, max(offset - limit, 0)
+            ) if offset else None,
+            "results": list(self.snapshot.iterate_over_objects(
+                model_route, limit=limit, offset=offset, **query_filters
+            )),
+        }
+
+    def iter_get(self, route, chunk_size=None, **kwargs):
+        response = self.get(route, **kwargs)
+        if "results" not in response:
+            yield response
+            return None
+
+        yield from response.pop("results")
+        return response
+
+    def post(self, route, **kwargs):
+        raise ReadOnlyAPIError()
+
+    def put(self, route, **kwargs):
+        raise ReadOnlyAPIError()
+
+    def patch(self, route, **kwargs):
+        raise ReadOnlyAPIError()
+
+    def delete(self, route, **kwargs):
+        raise ReadOnlyAPIError()
+
+    def options(self, route, **kwargs):
+        raise ReadOnlyAPIError()
+
+    def graphql(self, query, variables=None):
+        raise ReadOnlyAPIError()
+
+    def get_schema(self, app_name, model):
+        raise ReadOnlyAPIError()
+
+    def _split_route(self, route):
+        """
+        :returns: model route, and the object id if the route is an object
+            one
+        """
+        app_name, model, *params = [p for p in route.split("/") if p]
+        model_route = self.build_model_route(app_name, model)
+        if not params:
+            return model_route, None
+        elif len(params) == 1 and params[0].isdigit():
+            return model_route, int(params[0])
+
+        raise ValueError("Route {} is not in the snapshot".format(route))
+
+    def _get_object(self, model_route, object_id):
+        for obj in self.snapshot.iterate_over_objects(
+                model_route, ids=[object_id]
+        ):
+            return obj
+
+        response = _build_not_found_response(
+            "{}/{}{}/".format(self.url, model_route, object_id)
+        )
+        response.raise_for_status()
+
+    def _check_filters(self, model_route, filters):
+        """
+        :raises ValueError: if a filter is not `id`, `id__gt`, or the name of
+            a field of the objects, as the snapshot cannot evaluate lookups
+            like `name__ic` or the filters netbox computes like `site_id`
+        """
+        fields = self.snapshot.get_fields(model_route)
+        if not fields:
+            return
+
+        unknown = set(filters) - fields - {"id", "id__gt"}
+        if unknown:
+            raise ValueError(
+                "Filters not supported by the snapshot of {}: {}".format(
+                    model_route, ", ".join(sorted(unknown))
+                )
+            )
+
+    def _get_ids_filter(self, filters):
+        if "id" not in filters:
+            return None
+
+        ids = filters.pop("id")
+        if not isinstance(ids, (list, tuple, set)):
+            ids = [ids]
+        return [int(i) for i in ids]
+
+    def _get_id_gt_filter(self, filters):
+        id_gt = filters.pop("id__gt", None)
+        return None if id_gt is None else int(id_gt)
+
+    def _build_page_url(self, route, params, offset):
+        page_params = dict(params, offset=offset)
+        return "{}/{}?{}".format(
+            self.url, route.lstrip("/"),
+            urllib.parse.urlencode(page_params, doseq=True)
+        )
+
+
+def _get_filter_value(value):
+    """
+    :returns: value of a filter to compare with the object fields, as a
+        string
+    """
+    value = str(value)
+    # booleans can be received as "True", "true"…
+    if value.lower() in ("true", "false"):
+        return value.lower()
+
+    return value
+
+
+def _build_not_found_response(url):
+    """
+    :returns: `requests.Response` of a 404 error
+    """
+    response = requests.Response()
+    response.status_code = 404
+    response.reason = "Not Found"
+    response.url = url
+    return response
@@ -0,0 +1,210 @@
+import json
+import re
+
+
+_WHITESPACES = re.compile(r"[ \t\n\r]*")
+
+#: compact the buffer once this number of characters has been consumed
+_COMPACT_THRESHOLD = 65536
+
+
+class JSONStreamDecoder():
+    """
+    Incremental decoder of a netbox json answer
+
+    Text is fed by chunks while it is received, and the objects of the answer
+    are returned as soon as they are complete: items of the `results` list
+    for a paginated answer, items of a list, or the answer itself otherwise.
+    Only one object at a time is kept in memory.
+
+    Once everything has been fed, `close()` has to be called.
+    `remainder` is then the paginated answer without its `results`, or None
+    if the answer was not paginated.
+
+    :param results_key: key of the list to decode item by item in a json
+        object
+    """
+
+    def __init__(self, results_key="results"):
+        self.results_key = results_key
+        self.remainder = None
+
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        self._state = self._parse_start
+        self._root = None
+        self._key = None
+        self._paginated = False
+
+    def feed(self, text):
+        """
+        :param text: next chunk of the answer
+        :returns: list of objects completed by this chunk
+        """
+        self._buffer += text
+        return list(self._parse(final=False))
+
+    def close(self):
+        """
+        :returns: list of the last objects of the answer
+        """
+        objects = list(self._parse(final=True))
+        if self._state != self._parse_end:
+            raise json.JSONDecodeError(
+                "Unexpected end of answer", self._buffer, self._pos
+            )
+
+        if self._paginated:
+            self.remainder = self._root
+        elif isinstance(self._root, dict):
+            objects.append(self._root)
+
+        return objects
+
+    def _parse(self, final):
+        while self._state != self._parse_end:
+            self._skip_whitespaces()
+            if self._pos >= len(self._buffer):
+                break
+
+            state = self._state
+            try:
+                obj = state(final)
+            except _IncompleteError:
+                break
+
+            if obj is not _NOTHING:
+                yield obj
+
+        if self._pos > _COMPACT_THRESHOLD:
+            self._buffer = self._buffer[self._pos:]
+            self._pos = 0
+
+    def _skip_whitespaces(self):
+        self._pos = _WHITESPACES.match(self._buffer, self._pos).end()
+
+    def _next_char(self):
+        char = self._buffer[self._pos]
+        self._pos += 1
+        return char
+
+    def _decode_value(self, final):
+        """
+        Decode the value at the current position
+
+        A value ending with the buffer could be truncated (like a number), so
+        it is decoded only once more text has been received.
+        """
+        try:
+            value, end = self._decoder.raw_decode(self._buffer, self._pos)
+        except json.JSONDecodeError:
+            if final:
+                raise
+            raise _IncompleteError()
+
+        if end >= len(self._buffer) and not final:
+            raise _IncompleteError()
+
+        self._pos = end
+        return value
+
+    def _parse_start(self, final):
+        char = self._buffer[self._pos]
+        if char == "{":
+            self._pos += 1
+            self._root = {}
+            self._state = self._parse_key
+        elif char == "[":
+            self._pos += 1
+            self._state = self._parse_item
+        else:
+            self._root = self._decode_value(final)
+            self._state = self._parse_end
+            return self._root
+
+        return _NOTHING
+
+    def _parse_key(self, final):
+        if self._buffer[self._pos] == "}":
+            self._pos += 1
+            self._state = self._parse_end
+            return _NOTHING
+
+        start = self._pos
+        self._key = self._decode_value(final)
+        self._skip_whitespaces()
+        if self._pos >= len(self._buffer):
+            self._pos = start
+            raise _IncompleteError()
+
+        if self._next_char() != ":":
+            raise json.JSONDecodeError(
+                "Expecting ':' delimiter", self._buffer, self._pos - 1
+            )
+
+        self._state = self._parse_value
+        return _NOTHING
+
+    def _parse_value(self, final):
+        if self._key == self.results_key and self._buffer[self._pos] == "[":
+            self._pos += 1
+            self._paginated = True
+            self._state = self._parse_item
+        else:
+            self._root[self._key] = self._decode_value(final)
+            self._state = self._parse_key_separator
+
+        return _NOTHING
+
+    def _parse_key_separator(self, final):
+        char = self._next_char()
+        if char == ",":
+            self._state = self._parse_key
+        elif char == "}":
+            self._state = self._parse_end
+        else:
+            raise json.JSONDecodeError(
+                "Expecting ',' delimiter", self._buffer, self._pos - 1
+            )
+
+        return _NOTHING
+
+    def _parse_item(self, final):
+        if self._buffer[self._pos] == "]":
+            self._pos += 1
+            self._end_list()
+            return _NOTHING
+
+        item = self._decode_value(final)
+        self._state = self._parse_item_separator
+        return item
+
+    def _parse_item_separator(self, final):
+        char = self._next_char()
+        if char == ",":
+            self._state = self._parse_item
+        elif char == "]":
+            self._end_list()
+        else:
+            raise json.JSONDecodeError(
+                "Expecting ',' delimiter", self._buffer, self._pos - 1
+            )
+
+        return _NOTHING
+
+    def _end_list(self):
+        if self._root is None:
+            self._state = self._parse_end
+        else:
+            self._state = self._parse_key_separator
+
+    def _parse_end(self, final):
+        return _NOTHING
+
+
+class _IncompleteError(Exception):
+    pass
+
+
+_NOTHING = object()
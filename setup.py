@@ -26,9 +26,13 @@ setup(
     keywords=["netbox", "api"],
     packages=["netboxapi", ],
     install_requires=["requests", ],
+    extras_require={
+        "async": ["httpx", ],
+        "fast-json": ["orjson", ],
+    },
     setup_requires=["pytest-runner", ],
     tests_require=[
         "pytest", "pytest-cov", "pytest-mock", "pytest-xdist",
-        "requests-mock"
+        "requests-mock", "httpx"
     ],
 )
@@ -0,0 +1,5 @@
+import sys
+
+
+# async generators need python 3.6, and asyncio.run() python 3.7
+collect_ignore = ["test_aio.py"] if sys.version_info < (3, 7) else []
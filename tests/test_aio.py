@@ -0,0 +1,255 @@
+import asyncio
+import io
+import json
+import pytest
+
+httpx = pytest.importorskip("httpx")
+
+from netboxapi import ResponseCache
+from netboxapi.aio import (
+    AsyncNetboxAPI, AsyncNetboxMapper, AsyncNetboxPassiveMapper
+)
+
+
+class TestAsyncNetboxAPI():
+    url = "http://localhost/api"
+
+    def get_api(self, handler, **kwargs):
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        return AsyncNetboxAPI(self.url, client=client, **kwargs)
+
+    def test_get(self):
+        def handler(request):
+            assert request.url == self.url + "/test_app/test_model/"
+            return httpx.Response(200, json={"id": 1, "name": "test"})
+
+        api = self.get_api(handler)
+        response = asyncio.run(api.get("test_app/test_model/"))
+
+        assert response == {"id": 1, "name": "test"}
+
+    def test_get_loggedin_token(self):
+        def handler(request):
+            assert request.headers["Authorization"] == "Token test_token"
+            return httpx.Response(200, json={})
+
+        api = self.get_api(handler, token="test_token")
+        asyncio.run(api.get("test_app/test_model/"))
+
+    def test_client_options(self, mocker):
+        client_class = mocker.patch("netboxapi.aio.httpx.AsyncClient")
+        AsyncNetboxAPI(self.url, connect_timeout=3, pool_maxsize=4)
+
+        _, kwargs = client_class.call_args
+        assert kwargs["timeout"] == httpx.Timeout(None, connect=3)
+        assert kwargs["limits"] == httpx.Limits(
+            max_connections=4, max_keepalive_connections=4
+        )
+
+    def test_client_no_timeout(self):
+        api = AsyncNetboxAPI(self.url)
+        assert api.session.timeout == httpx.Timeout(None)
+
+    def test_unsupported_options(self):
+        with pytest.raises(ValueError):
+            AsyncNetboxAPI(self.url, response_cache=ResponseCache())
+        with pytest.raises(ValueError):
+            AsyncNetboxAPI(self.url, single_flight=True)
+
+    def test_get_many(self):
+        def handler(request):
+            if request.url.path == "/api/status/":
+                return httpx.Response(200, json={"netbox-version": "4.0"})
+
+            offset = int(request.url.params.get("offset", 0))
+            return httpx.Response(200, json={
+                "count": 2, "previous": None, "results": [{"id": offset}],
+                "next": (
+                    self.url + "/dcim/sites/?limit=1&offset=1"
+                    if not offset else None
+                ),
+            })
+
+        api = self.get_api(handler)
+
+        async def get_many():
+            return {
+                route: result async for route, result in api.get_many(
+                    ["dcim/sites/", "status/"], max_workers=1
+                )
+            }
+
+        assert asyncio.run(get_many()) == {
+            "dcim/sites/": [{"id": 0}, {"id": 1}],
+            "status/": {"netbox-version": "4.0"},
+        }
+
+    def test_post(self):
+        def handler(request):
+            assert request.method == "POST"
+            return httpx.Response(201, json=json.loads(request.content))
+
+        api = self.get_api(handler)
+        response = asyncio.run(
+            api.post("test_app/test_model/", json={"name": "test"})
+        )
+
+        assert response == {"name": "test"}
+
+    def test_http_error(self):
+        api = self.get_api(lambda request: httpx.Response(500))
+
+        with pytest.raises(httpx.HTTPStatusError):
+            asyncio.run(api.get("test_app/test_model/"))
+
+
+class TestAsyncNetboxMapper():
+    url = "http://localhost/api"
+
+    def get_mapper(self, handler):
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        api = AsyncNetboxAPI(self.url, client=client)
+        return AsyncNetboxMapper(api, "test_app", "test_model")
+
+    async def collect(self, async_iterable):
+        return [i async for i in async_iterable]
+
+    def test_get_pagination(self):
+        nb_obj = 75
+        results = [
+            {"id": i, "name": "test{}".format(i)} for i in range(nb_obj)
+        ]
+
+        def handler(request):
+            offset = int(request.url.params.get("offset", 0))
+            return httpx.Response(200, json={
+                "count": nb_obj,
+                "next": (
+                    self.url + "/test_app/test_model/?limit=50&offset=50"
+                    if offset + 50 < nb_obj else None
+                ),
+                "previous": None, "results": results[offset:offset + 50]
+            })
+
+        mapper = self.get_mapper(handler)
+        received = asyncio.run(self.collect(mapper.get(limit=50)))
+
+        assert [r["id"] for r in results] == [r.id for r in received]
+        assert isinstance(received[0], AsyncNetboxMapper)
+
+    def test_count(self):
+        def handler(request):
+            assert request.url.params["limit"] == "1"
+            return httpx.Response(200, json={
+                "count": 3, "next": None, "previous": None,
+                "results": [{"id": 1}]
+            })
+
+        mapper = self.get_mapper(handler)
+
+        assert asyncio.run(mapper.count(name="test")) == 3
+        assert asyncio.run(mapper.exists(name="test"))
+
+    def test_graphql(self):
+        def handler(request):
+            assert request.url.path == "/graphql/"
+            return httpx.Response(200, json={"data": {"device": {
+                "id": "1", "name": "test", "site": {"id": "2", "name": "site"}
+            }}})
+
+        mapper = self.get_mapper(handler)
+
+        async def get_site():
+            async for child_mapper in mapper.graphql(
+                    "{ device(id: 1) }", models={"site": ("dcim", "sites")}
+            ):
+                return await child_mapper.site
+
+        assert asyncio.run(get_site()).name == "site"
+
+    def test_export(self):
+        def handler(request):
+            return httpx.Response(200, json={
+                "count": 1, "next": None, "previous": None,
+                "results": [{"id": 1, "site": {"id": 2, "url": "site_url"}}]
+            })
+
+        mapper = self.get_mapper(handler)
+        out = io.StringIO()
+
+        assert asyncio.run(mapper.export(out=out)) == 1
+        assert out.getvalue() == '{"id": 1, "site": 2}\n'
+
+    def test_get_as_records(self):
+        def handler(request):
+            return httpx.Response(200, json={
+                "count": 1, "next": None, "previous": None,
+                "results": [{"id": 1, "name": "test"}]
+            })
+
+        mapper = self.get_mapper(handler)
+        records = asyncio.run(self.collect(mapper.get(as_records=["name"])))
+
+        assert [r.name for r in records] == ["test"]
+
+    def test_get_unsupported_options(self):
+        def handler(request):
+            raise AssertionError("no request should be sent")
+
+        mapper = self.get_mapper(handler)
+        for options in ({"max_workers": 3}, {"stream": True}):
+            with pytest.raises(ValueError):
+                asyncio.run(self.collect(mapper.get(**options)))
+        with pytest.raises(ValueError):
+            mapper.netbox_api.iter_get("dcim/sites/")
+
+    def test_foreign_key(self):
+        vrf_url = self.url + "/ipam/vrfs/1/"
+
+        def handler(request):
+            if request.url.path == "/api/ipam/vrfs/1/":
+                return httpx.Response(200, json={"id": 1, "name": "vrf"})
+            return httpx.Response(200, json={
+                "id": 1, "name": "test", "vrf": {"id": 1, "url": vrf_url}
+            })
+
+        mapper = self.get_mapper(handler)
+
+        async def get_vrf():
+            async for child_mapper in mapper.get(1):
+                return child_mapper, await child_mapper.vrf
+
+        child_mapper, vrf = asyncio.run(get_vrf())
+        assert vrf.name == "vrf"
+        assert child_mapper.to_dict() == {"id": 1, "name": "test", "vrf": 1}
+
+    def test_post_with_failing_get(self):
+        def handler(request):
+            if request.method == "POST":
+                return httpx.Response(201, json={"id": 1, "name": "test"})
+            return httpx.Response(404)
+
+        mapper = self.get_mapper(handler)
+        child_mapper = asyncio.run(
+            mapper.post(name="test", refetch=True)
+        )
+
+        assert isinstance(child_mapper, AsyncNetboxPassiveMapper)
+        assert child_mapper.name == "test"
+
+    def test_bulk_create(self):
+        def handler(request):
+            assert request.method == "POST"
+            return httpx.Response(201, json=[
+                dict(obj, id=i)
+                for i, obj in enumerate(json.loads(request.content), 1)
+            ])
+
+        mapper = self.get_mapper(handler)
+        child_mappers = asyncio.run(
+            mapper.bulk_create([{"name": "test1"}, {"name": "test2"}])
+        )
+
+        assert [(m.id, m.name) for m in child_mappers] == [
+            (1, "test1"), (2, "test2")
+        ]
@@ -1,9 +1,14 @@
 
+import json
 import pytest
+import requests
 import requests_mock
+import threading
+import time
 
-from netboxapi import NetboxAPI
+from netboxapi import NetboxAPI, ResponseCache, RetryPolicy, SchemaCache
 from netboxapi.api import _HTTPTokenAuth
+from netboxapi.exceptions import GraphQLError
 
 
 class TestNetboxAPI():
@@ -38,6 +43,274 @@ class TestNetboxAPI():
         expected_url = self.url + "/{}/{}".format(app, model).rstrip("/")
         assert model_url == expected_url
 
+    def test_pool_size(self):
+        api = NetboxAPI(self.url, pool_connections=2, pool_maxsize=20)
+        adapter = api.session.get_adapter(self.url)
+
+        assert adapter._pool_connections == 2
+        assert adapter._pool_maxsize == 20
+
+    def test_custom_adapter(self):
+        adapter = requests_mock.Adapter()
+        adapter.register_uri("get", self.url + "/test/", json={"id": 1})
+        api = NetboxAPI(self.url, adapter=adapter)
+
+        assert api.get("test/") == {"id": 1}
+
+    def test_timeout(self):
+        api = NetboxAPI(self.url, connect_timeout=3, read_timeout=30)
+        with requests_mock.Mocker() as m:
+            m.register_uri("get", self.url + "/test/", json={})
+            api.get("test/")
+
+        assert m.last_request.timeout == (3, 30)
+
+    def test_retry(self, mocker):
+        sleep = mocker.patch("netboxapi.api.time.sleep")
+        api = NetboxAPI(self.url, retry_policy=RetryPolicy(max_attempts=3))
+        with requests_mock.Mocker() as m:
+            m.register_uri("get", self.url + "/test/", [
+                {"status_code": 503},
+                {"status_code": 429, "headers": {"Retry-After": "7"}},
+                {"json": {"id": 1}},
+            ])
+            assert api.get("test/") == {"id": 1}
+
+        assert m.call_count == 3
+        assert sleep.call_args_list[-1] == mocker.call(7)
+
+    def test_retry_exhausted(self, mocker):
+        mocker.patch("netboxapi.api.time.sleep")
+        api = NetboxAPI(self.url, retry_policy=RetryPolicy(max_attempts=2))
+        with requests_mock.Mocker() as m:
+            m.register_uri(
+                "get", self.url + "/test/",
+                exc=requests.exceptions.ConnectTimeout
+            )
+            with pytest.raises(requests.exceptions.ConnectTimeout):
+                api.get("test/")
+
+        assert m.call_count == 2
+
+    def test_no_retry_post(self, mocker):
+        api = NetboxAPI(self.url, retry_policy=RetryPolicy())
+        with requests_mock.Mocker() as m:
+            m.register_uri("post", self.url + "/test/", status_code=503)
+            with pytest.raises(requests.exceptions.HTTPError):
+                api.post("test/", json={})
+
+        assert m.call_count == 1
+
+    def test_json_codec(self):
+        calls = []
+
+        class Codec():
+            def loads(self, s):
+                calls.append("loads")
+                return json.loads(s)
+
+            def dumps(self, obj):
+                calls.append("dumps")
+                return json.dumps(obj)
+
+        api = NetboxAPI(self.url, json_codec=Codec())
+        with requests_mock.Mocker() as m:
+            m.register_uri(
+                "post", self.url + "/test/",
+                json=lambda request, context: request.json()
+            )
+            response = api.post("test/", json={"name": "tést"})
+
+        assert response == {"name": "tést"}
+        assert calls == ["dumps", "loads"]
+        assert m.last_request.headers["Content-Type"] == "application/json"
+
+    def test_response_cache_etag(self):
+        api = NetboxAPI(self.url, response_cache=ResponseCache())
+        url = self.url + "/dcim/sites/"
+        with requests_mock.Mocker() as m:
+            m.register_uri("get", url, [
+                {"json": {"id": 1}, "headers": {"ETag": '"v1"'}},
+                {"status_code": 304},
+            ])
+            assert api.get("dcim/sites/", params={"q": "a"}) == {"id": 1}
+            assert api.get("dcim/sites/", params={"q": "a"}) == {"id": 1}
+
+        assert m.call_count == 2
+        assert m.last_request.headers["If-None-Match"] == '"v1"'
+
+    def test_response_cache_ttl(self):
+        api = NetboxAPI(self.url, response_cache=ResponseCache(ttl=60))
+        url = self.url + "/dcim/sites/"
+        with requests_mock.Mocker() as m:
+            m.register_uri("get", url, json={"id": 1})
+            m.register_uri("delete", url + "1/", status_code=204)
+            api.get("dcim/sites/")
+            api.get("dcim/sites/")
+            assert m.call_count == 1
+
+            api.delete("dcim/sites/1/")
+            api.get("dcim/sites/")
+            assert m.call_count == 3
+
+    def test_response_cache_options(self):
+        api = NetboxAPI(self.url, response_cache=ResponseCache(ttl=60))
+        url = self.url + "/dcim/sites/"
+        with requests_mock.Mocker() as m:
+            get_req = m.register_uri("get", url, json={"id": 1})
+            m.register_uri("options", url, json={"name": "Site List"})
+            api.get("dcim/sites/")
+            api.options("dcim/sites/")
+            api.get("dcim/sites/")
+
+        assert get_req.call_count == 1
+
+    def test_json_codec_text_only(self):
+        class Codec():
+            def loads(self, s):
+                if not isinstance(s, str):
+                    raise TypeError("the JSON object must be str")
+                return json.loads(s)
+
+            def dumps(self, obj):
+                return json.dumps(obj)
+
+        api = NetboxAPI(self.url, json_codec=Codec())
+        with requests_mock.Mocker() as m:
+            m.register_uri(
+                "get", self.url + "/test/", json={"name": "tést"}
+            )
+            response = api.get("test/")
+
+        assert response == {"name": "tést"}
+
+    def test_get_many(self, prepared_api):
+        sites_url = self.url + "/dcim/sites/"
+        with requests_mock.Mocker() as m:
+            m.register_uri("get", sites_url + "?limit=1", json={
+                "count": 2, "next": sites_url + "?limit=1&offset=1",
+                "previous": None, "results": [{"id": 1}]
+            })
+            m.register_uri("get", sites_url + "?limit=1&offset=1", json={
+                "count": 2, "next": None, "previous": None,
+                "results": [{"id": 2}]
+            })
+            m.register_uri("get", self.url + "/status/", json={"ok": True})
+            results = dict(prepared_api.get_many({
+                "dcim/sites/": {"limit": 1}, "status/": None
+            }))
+
+        assert results == {
+            "dcim/sites/": [{"id": 1}, {"id": 2}], "status/": {"ok": True}
+        }
+
+    def test_get_many_error(self, prepared_api):
+        with requests_mock.Mocker() as m:
+            m.register_uri("get", self.url + "/dcim/sites/", status_code=500)
+            with pytest.raises(requests.exceptions.HTTPError):
+                dict(prepared_api.get_many(["dcim/sites/"]))
+
+    def test_graphql(self, prepared_api):
+        assert prepared_api.graphql_url == "http://localhost/graphql/"
+        with requests_mock.Mocker() as m:
+            m.register_uri(
+                "post", prepared_api.graphql_url,
+                json={"data": {"device": {"name": "test"}}}
+            )
+            data = prepared_api.graphql(
+                "query ($id: ID!) { device(id: $id) { name } }", {"id": 1}
+            )
+
+        assert data == {"device": {"name": "test"}}
+        assert m.last_request.json()["variables"] == {"id": 1}
+
+    def test_graphql_error(self, prepared_api):
+        with requests_mock.Mocker() as m:
+            m.register_uri("post", prepared_api.graphql_url, json={
+                "data": None, "errors": [{"message": "Unknown field"}]
+            })
+            with pytest.raises(GraphQLError, match="Unknown field"):
+                prepared_api.graphql("{ unknown }")
+
+    def test_single_flight(self, prepared_api):
+        url = self.url + "/dcim/racks/1/"
+        nb_threads = 4
+        barrier = threading.Barrier(nb_threads)
+        results = []
+
+        def slow_answer(request, context):
+            time.sleep(0.2)
+            return {"id": 1}
+
+        def get_rack():
+            barrier.wait()
+            results.append(prepared_api.get("dcim/racks/1/"))
+
+        with requests_mock.Mocker() as m:
+            m.register_uri("get", url, json=slow_answer)
+            threads = [
+                threading.Thread(target=get_rack) for _ in range(nb_threads)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            assert m.call_count == 1
+            assert results == [{"id": 1}] * nb_threads
+            # each caller gets its own unpacked answer
+            assert len(set(id(r) for r in results)) == nb_threads
+
+            prepared_api.get("dcim/racks/1/")
+            assert m.call_count == 2
+
+    def test_single_flight_key(self, prepared_api):
+        get_key = prepared_api._get_single_flight_key
+
+        assert get_key("get", "dcim/racks/", {"params": {"a": 1}}) == (
+            "get", self.url + "/dcim/racks/?a=1"
+        )
+        assert get_key("get", "dcim/racks/", {"stream": True}) is None
+        assert get_key("post", "dcim/racks/", {}) is None
+
+        prepared_api.single_flight = False
+        assert get_key("get", "dcim/racks/", {}) is None
+
+    def test_schema_cache(self):
+        api = NetboxAPI(self.url, schema_cache=SchemaCache())
+        options = {"actions": {"POST": {"name": {"read_only": False}}}}
+        with requests_mock.Mocker() as m:
+            m.register_uri("options", self.url + "/dcim/sites/", json=options)
+            m.register_uri(
+                "options", self.url + "/dcim/sites/1/", json=options
+            )
+            assert api.options("dcim/sites/") == options
+            assert api.get_schema("dcim", "sites").writable_fields == {
+                "name"
+            }
+            assert m.call_count == 1
+
+            # routes of objects are not cached
+            api.options("dcim/sites/1/")
+            assert m.call_count == 2
+
+    def test_schema_cache_directory(self, tmp_path):
+        options = {"actions": {"POST": {"name": {"read_only": False}}}}
+        with requests_mock.Mocker() as m:
+            m.register_uri("options", self.url + "/dcim/sites/", json=options)
+            m.register_uri(
+                "get", self.url + "/status/", json={"netbox-version": "4.0"}
+            )
+            for _ in range(2):
+                api = NetboxAPI(
+                    self.url, schema_cache=SchemaCache(str(tmp_path))
+                )
+                assert api.options("dcim/sites/") == options
+
+            assert [r.method for r in m.request_history] == [
+                "GET", "OPTIONS", "GET"
+            ]
+
     def test_get(self, prepared_api, **kwargs):
         self._generic_test_http_method_request(prepared_api, "get")
 
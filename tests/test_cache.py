@@ -0,0 +1,76 @@
+import pytest
+
+from netboxapi.cache import LRUCache, ResponseCache
+
+
+class TestLRUCache():
+    def test_get_set(self):
+        cache = LRUCache(2)
+        cache.set("a", 1)
+
+        assert cache.get("a") == 1
+        assert "a" in cache
+        assert cache.get("b") is None
+
+    def test_eviction(self):
+        cache = LRUCache(2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        # "a" becomes the most recently used
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert len(cache) == 2
+        assert "a" in cache
+        assert "b" not in cache
+
+    def test_ttl(self, mocker):
+        monotonic = mocker.patch("netboxapi.cache.time.monotonic")
+        monotonic.return_value = 100
+        cache = LRUCache(2, ttl=10)
+        cache.set("a", 1)
+
+        monotonic.return_value = 105
+        assert cache.get("a") == 1
+
+        monotonic.return_value = 110
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+    def test_none_value(self):
+        cache = LRUCache(2)
+        cache.set("a", None)
+
+        assert "a" in cache
+
+
+class TestResponseCache():
+    @pytest.fixture(params=("memory", "disk"))
+    def cache(self, request, tmp_path):
+        if request.param == "disk":
+            return ResponseCache(ttl=10, directory=str(tmp_path))
+        return ResponseCache(ttl=10)
+
+    def test_get_set(self, cache):
+        cache.set("dcim/sites", "url", b"body", {"ETag": "1"})
+        entry = cache.get("dcim/sites", "url")
+
+        assert (entry.body, entry.headers) == (b"body", {"ETag": "1"})
+        assert cache.is_fresh(entry)
+        assert cache.get("dcim/sites", "another url") is None
+
+    def test_invalidate(self, cache):
+        cache.set("dcim/sites", "url", b"body", {})
+        cache.set("dcim/racks", "url", b"body", {})
+        cache.invalidate("dcim/sites")
+
+        assert cache.get("dcim/sites", "url") is None
+        assert cache.get("dcim/racks", "url") is not None
+
+    def test_ttl(self, cache, mocker):
+        time = mocker.patch("netboxapi.cache.time.time")
+        time.return_value = 100
+        entry = cache.set("dcim/sites", "url", b"body", {})
+
+        time.return_value = 110
+        assert not cache.is_fresh(entry)
@@ -1,11 +1,16 @@
 import copy
+import io
+import itertools
+import json
 import pytest
 import requests_mock
+import threading
 
 from netboxapi import NetboxMapper, NetboxAPI
 from netboxapi.mapper import NetboxPassiveMapper
 from netboxapi.exceptions import (
-    ForbiddenAsChildError, ForbiddenAsPassiveMapperError
+    ForbiddenAsChildError, ForbiddenAsPassiveMapperError, PartialMapperError,
+    ValidationError
 )
 
 
@@ -130,6 +135,336 @@ class TestNetboxMapper():
             assert expected["id"] == received.id
             assert expected["name"] == received.name
 
+    def test_get_pagination_concurrent(self, mapper):
+        url = self.get_mapper_url(mapper)
+        nb_obj = 120
+        results = [
+            {"id": i, "name": "test{}".format(i)} for i in range(nb_obj)
+        ]
+
+        def page_callback(request, context):
+            offset = int(request.qs.get("offset", ["0"])[0])
+            next_offset = offset + 25
+            return {
+                "count": nb_obj,
+                "next": (
+                    url + "?limit=25&offset={}".format(next_offset)
+                    if next_offset < nb_obj else None
+                ),
+                "previous": None, "results": results[offset:next_offset]
+            }
+
+        with requests_mock.Mocker() as m:
+            m.register_uri("get", url, json=page_callback)
+            received_list = tuple(mapper.get(limit=25, max_workers=3))
+
+        assert m.call_count == 5
+        assert [r["id"] for r in results] == [r.id for r in received_list]
+
+    def test_get_concurrent_pagination_stopped(self, mapper):
+        url = self.get_mapper_url(mapper)
+        nb_obj = 200
+        requested_offsets = []
+        released = threading.Event()
+
+        def page_callback(request, context):
+            offset = int(request.qs.get("offset", ["0"])[0])
+            requested_offsets.append(offset)
+            if offset >= 50:
+                released.wait(5)
+            return {
+                "count": nb_obj, "previous": None,
+                "next": url + "?limit=25&offset={}".format(offset + 25),
+                "results": [{"id": i} for i in range(offset, offset + 25)]
+            }
+
+        with requests_mock.Mocker() as m:
+            m.register_uri("get", url, json=page_callback)
+            children = mapper.get(limit=25, max_workers=1)
+            assert len(list(itertools.islice(children, 50))) == 50
+
+            threading.Timer(0.1, released.set).start()
+            children.close()
+
+        # the pages queued when stopped have been cancelled
+        assert max(requested_offsets) <= 50
+
+    def test_get_pagination_capped_limit(self, mapper):
+        """
+        Netbox can apply a lower limit than the requested one, the pagination
+        should follow it and not skip any object
+        """
+        url = self.get_mapper_url(mapper)
+        nb_obj = 75
+        results = [{"id": i} for i in range(nb_obj)]
+
+        def page_callback(request, context):
+            offset = int(request.qs.get("offset", ["0"])[0])
+            next_offset = offset + 25
+            return {
+                "count": nb_obj,
+                "next": (
+                    url + "?limit=25&offset={}".format(next_offset)
+                    if next_offset < nb_obj else None
+                ),
+                "previous": None, "results": results[offset:next_offset]
+            }
+
+        filters = {"name": "test"}
+        with requests_mock.Mocker() as m:
+            m.register_uri("get", url, json=page_callback)
+            received_list = tuple(mapper.get(limit=50, **filters))
+
+        assert [r["id"] for r in results] == [r.id for r in received_list]
+        assert m.last_request.qs["name"] == ["test"]
+        assert filters == {"name": "test"}
+
+    def test_get_pagination_keyset(self, mapper):
+        url = self.get_mapper_url(mapper)
+        nb_obj = 75
+        results = [{"id": i} for i in range(1, nb_obj + 1)]
+
+        def page_callback(request, context):
+            assert request.qs["ordering"] == ["id"]
+            assert "offset" not in request.qs
+            id_gt = int(request.qs.get("id__gt", ["0"])[0])
+            remaining = [r for r in results if r["id"] > id_gt]
+            return {
+                "count": len(remaining),
+                "next": url + "?cursor" if len(remaining) > 30 else None,
+                "previous": None, "results": remaining[:30]
+            }
+
+        with requests_mock.Mocker() as m:
+            m.register_uri("get", url, json=page_callback)
+            received_list = tuple(mapper.get(limit=30, keyset=True))
+
+        assert m.call_count == 3
+        assert [r["id"] for r in results] == [r.id for r in received_list]
+
+    def test_get_pagination_stream(self, mapper):
+        url = self.get_mapper_url(mapper)
+        next_url = url + "?limit=50&offset=50"
+        nb_obj = 75
+        results = [
+            {"id": i, "name": "test{}".format(i)} for i in range(nb_obj)
+        ]
+
+        with requests_mock.Mocker() as m:
+            m.register_uri(
+                "get", url, json={
+                    "count": nb_obj, "next": next_url,
+                    "previous": None, "results": results[:50]
+                }
+            )
+            m.register_uri(
+                "get", next_url, json={
+                    "count": nb_obj, "next": None,
+                    "previous": url, "results": results[50:]
+                }
+            )
+            received_list = tuple(mapper.get(limit=50, stream=True))
+
+        assert [r["id"] for r in results] == [r.id for r in received_list]
+
+    def test_get_as_records(self, mapper):
+        url = self.get_mapper_url(mapper)
+        vrf_url = mapper.netbox_api.build_model_url("ipam", "vrfs") + "1/"
+        expected_attr = {
+            "count": 2, "next": None, "previous": None,
+            "results": [
+                {"id": i, "name": "test{}".format(i),
+                 "vrf": {"id": 1, "url": vrf_url}} for i in (1, 2)
+            ]
+        }
+        with requests_mock.Mocker() as m:
+            m.register_uri("get", url, json=expected_attr)
+            first, second = mapper.get(as_records=True)
+            projected = next(mapper.get(as_records=["id", "vrf", "missing"]))
+
+        assert type(first) is type(second)
+        assert (first.id, first.name) == (1, "test1")
+        assert second.vrf == {"id": 1, "url": vrf_url}
+        with pytest.raises(AttributeError):
+            first.name = "another name"
+        assert tuple(projected) == (1, {"id": 1, "url": vrf_url}, None)
+
+        child_mapper = mapper.mapper_from_record(first)
+        assert child_mapper.to_dict() == {"id": 1, "name": "test1", "vrf": 1}
+        assert child_mapper._route == mapper._route + "1/"
+        assert not child_mapper.__partial__
+
+        projected_mapper = mapper.mapper_from_record(projected)
+        assert projected_mapper.__partial__
+        with pytest.raises(PartialMapperError):
+            projected_mapper.put()
+
+    def test_get_fields(self, mapper):
+        url = self.get_mapper_url(mapper)
+        expected_attr = {
+            "count": 1, "next": None, "previous": None,
+            "results": [{"id": 1, "name": "test"}]
+        }
+        with requests_mock.Mocker() as m:
+            m.register_uri("get", url, json=expected_attr)
+            child_mapper = next(mapper.get(fields=["id", "name"]))
+
+        assert m.last_request.qs["fields"] == ["id,name"]
+        assert child_mapper.__partial__
+        with pytest.raises(PartialMapperError):
+            child_mapper.put()
+
+        child_mapper.name = "another name"
+        with requests_mock.Mocker() as m:
+            received_req = m.register_uri("patch", url + "1/", json={})
+            child_mapper.save()
+
+        assert received_req.last_request.json() == {"name": "another name"}
+
+    def test_get_brief(self, mapper):
+        url = self.get_mapper_url(mapper)
+        expected_attr = {
+            "count": 1, "next": None, "previous": None,
+            "results": [{"id": 1, "name": "test"}]
+        }
+        with requests_mock.Mocker() as m:
+            m.register_uri("get", url, json=expected_attr)
+            child_mapper = next(mapper.get(brief=True))
+
+        assert m.last_request.qs["brief"] == ["true"]
+        with pytest.raises(PartialMapperError):
+            mapper.bulk_update([child_mapper])
+
+    def test_graphql(self, mapper):
+        data = {"device_list": [{
+            "id": "1", "name": "test",
+            "site": {"id": "2", "name": "site"},
+            "interfaces": [{
+                "id": "3", "name": "eth0",
+                "ip_addresses": [{"id": "4", "vrf": {"id": "5"}}],
+            }],
+        }]}
+        models = {
+            "site": ("dcim", "sites"), "interfaces": ("dcim", "interfaces"),
+            "ip_addresses": ("ipam", "ip-addresses"), "vrf": ("ipam", "vrfs"),
+        }
+        with requests_mock.Mocker() as m:
+            m.register_uri(
+                "post", self.api.graphql_url, json={"data": data}
+            )
+            child_mapper = next(
+                mapper.graphql("{ device_list }", models=models)
+            )
+            ip_address = child_mapper.interfaces[0].ip_addresses[0]
+
+            assert child_mapper.site.name == "site"
+            assert ip_address.vrf.id == 5
+            assert m.call_count == 1
+
+        assert child_mapper.__partial__
+        assert child_mapper._route == mapper._route + "1/"
+        assert ip_address._route == "ipam/ip-addresses/4/"
+        assert child_mapper.to_dict() == {"id": 1, "name": "test", "site": 2}
+
+    def test_validate(self, mapper):
+        url = self.get_mapper_url(mapper)
+        child_mapper = mapper._build_new_mapper_from(
+            {"id": 1, "status": {"value": "active", "label": "Active"}},
+            mapper._route + "1/"
+        )
+        with requests_mock.Mocker() as m:
+            m.register_uri("options", url, json={"actions": {"POST": {
+                "id": {"read_only": True},
+                "status": {"choices": [
+                    {"value": "active", "display_name": "Active"}
+                ]},
+            }}})
+            child_mapper.validate()
+
+            child_mapper.status = "unknown"
+            with pytest.raises(ValidationError):
+                child_mapper.validate()
+
+    def test_export_jsonl(self, mapper):
+        url = self.get_mapper_url(mapper)
+        results = [{
+            "id": i, "name": "test{}".format(i),
+            "site": {"id": 1, "url": "site_url", "name": "site1"},
+            "status": {"value": "active", "label": "Active"},
+            "tags": [{"id": 2, "url": "tag_url", "name": "tag2"}],
+        } for i in range(1, 4)]
+        out = io.StringIO()
+        with requests_mock.Mocker() as m:
+            m.register_uri("get", url + "?limit=2", json={
+                "count": 3, "next": url + "?limit=2&offset=2",
+                "previous": None, "results": results[:2]
+            })
+            m.register_uri("get", url + "?limit=2&offset=2", json={
+                "count": 3, "next": None, "previous": None,
+                "results": results[2:]
+            })
+            nb_objects = mapper.export(out=out, limit=2)
+
+        assert nb_objects == 3
+        lines = out.getvalue().splitlines()
+        assert len(lines) == 3
+        assert json.loads(lines[0]) == {
+            "id": 1, "name": "test1", "site": 1, "status": "active",
+            "tags": [2],
+        }
+
+    def test_export_csv(self, mapper):
+        url = self.get_mapper_url(mapper)
+        out = io.StringIO()
+        with requests_mock.Mocker() as m:
+            m.register_uri("get", url, json={
+                "count": 1, "next": None, "previous": None, "results": [{
+                    "id": 1, "name": "test", "vrf": None,
+                    "site": {"id": 1, "url": "site_url", "name": "site1"},
+                    "tags": [
+                        {"id": 2, "url": "tag_url", "name": "tag2"},
+                        {"id": 3, "url": "tag_url", "name": "tag3"},
+                    ],
+                }]
+            })
+            mapper.export(
+                fmt="csv", fields=["name", "site", "vrf", "tags"], out=out,
+                foreign_keys="name"
+            )
+
+        assert out.getvalue().splitlines() == [
+            "name,site,vrf,tags", 'test,site1,,"tag2,tag3"'
+        ]
+
+    def test_export_unknown_format(self, mapper):
+        with pytest.raises(ValueError):
+            mapper.export(fmt="xml")
+
+    def test_count(self, mapper):
+        url = self.get_mapper_url(mapper)
+        site = self.get_mapper()
+        site.id = 3
+        with requests_mock.Mocker() as m:
+            m.register_uri("get", url, json={
+                "count": 42, "next": url + "?limit=1&offset=1",
+                "previous": None, "results": [{"id": 1}]
+            })
+            assert mapper.count(site=site, offset=10) == 42
+            assert mapper.exists(site=site)
+
+        assert m.call_count == 2
+        assert m.last_request.qs == {
+            "site": ["3"], "limit": ["1"], "brief": ["true"]
+        }
+
+    def test_exists_without_match(self, mapper):
+        url = self.get_mapper_url(mapper)
+        with requests_mock.Mocker() as m:
+            m.register_uri("get", url + "1/interfaces/", json={
+                "count": 0, "next": None, "previous": None, "results": []
+            })
+            assert not mapper.exists(1, "interfaces", name="eth0")
+
     def test_get_submodel_with_choice(self, mapper):
         """
         Choices are enum handled by netbox. Try to get a model with it.
@@ -168,14 +503,36 @@ class TestNetboxMapper():
         # request mocker is down, so any new request will fail
         assert vrf == child_mapper.vrf
 
+    def test_shared_cache_foreign_key(self):
+        api = NetboxAPI(self.url, fk_cache_size=10)
+        mapper = NetboxMapper(api, self.test_app_name, self.test_model)
+        vrf_url = api.build_model_url("ipam", "vrfs") + "1/"
+        url = self.get_mapper_url(mapper)
+        expected_attr = {
+            "count": 2, "next": None, "previous": None,
+            "results": [
+                {"id": i, "vrf": {"id": 1, "url": vrf_url}} for i in (1, 2)
+            ]
+        }
+        with requests_mock.Mocker() as m:
+            m.register_uri("get", url, json=expected_attr)
+            vrf_req = m.register_uri(
+                "get", vrf_url, json={"id": 1, "name": "vrf_test"}
+            )
+            first, second = mapper.get()
+            assert first.vrf is second.vrf
+
+        assert vrf_req.call_count == 1
+        assert first._fk_cache == {}
+
     def test_multiple_get_foreign_key(self, mapper):
         """
         Test multiple get on the same object to control foreign keys behavior
 
-        As foreign keys are properties, a unique class is done to any object
-        based on its route. But if multiple successiveget are done on the same
-        object, the class does not change and its properties should be
-        overriden.
+        As foreign keys are properties, a class is shared by all objects of a
+        model having the same foreign keys. If multiple successive get are done
+        on the same object, the class does not change and the foreign keys
+        should be resolved from the new values.
         """
         attr = {
             "id": 1, "name": "test",
@@ -211,6 +568,97 @@ class TestNetboxMapper():
             child_mapper = next(child_mapper.get())
             assert child_mapper.vrf.id == 2
 
+    def test_foreign_key_shared_class(self, mapper):
+        """
+        Objects of a same model share their class, but not their foreign keys
+        """
+        vrf_url = mapper.netbox_api.build_model_url("ipam", "vrfs")
+        url = self.get_mapper_url(mapper)
+        expected_attr = {
+            "count": 2, "next": None, "previous": None,
+            "results": [
+                {
+                    "id": i, "name": "test{}".format(i),
+                    "vrf": {"id": i, "url": vrf_url + "{}/".format(i)}
+                } for i in (1, 2)
+            ]
+        }
+        with requests_mock.Mocker() as m:
+            m.register_uri("get", url, json=expected_attr)
+            first, second = mapper.get()
+
+            for i in (1, 2):
+                m.register_uri(
+                    "get", vrf_url + "{}/".format(i),
+                    json={"id": i, "name": "vrf{}".format(i)}
+                )
+
+            assert type(first) is type(second)
+            assert first.vrf.name == "vrf1"
+            assert second.vrf.name == "vrf2"
+            assert (first._vrf_id, second._vrf_id) == (1, 2)
+
+    def test_get_prefetch_foreign_key(self, mapper):
+        vrf_url = mapper.netbox_api.build_model_url("ipam", "vrfs")
+        url = self.get_mapper_url(mapper)
+        expected_attr = {
+            "count": 4, "next": None, "previous": None,
+            "results": [
+                {
+                    "id": i, "name": "test{}".format(i),
+                    "vrf": {"id": i % 2, "url": vrf_url + "{}/".format(i % 2)}
+                } for i in range(4)
+            ]
+        }
+        with requests_mock.Mocker() as m:
+            m.register_uri("get", url, json=expected_attr)
+            vrf_req = m.register_uri(
+                "get", vrf_url, json={
+                    "count": 2, "next": None, "previous": None,
+                    "results": [
+                        {"id": i, "name": "vrf{}".format(i)} for i in (0, 1)
+                    ]
+                }
+            )
+            child_mappers = list(mapper.get(prefetch=["vrf"]))
+
+        assert vrf_req.call_count == 1
+        assert vrf_req.last_request.qs["id"] == ["0", "1"]
+        # request mocker is down, so any new request will fail
+        for i, child_mapper in enumerate(child_mappers):
+            assert child_mapper.vrf.name == "vrf{}".format(i % 2)
+
+    def test_get_prefetch_foreign_key_small_shared_cache(self):
+        api = NetboxAPI(self.url, fk_cache_size=2)
+        mapper = NetboxMapper(api, self.test_app_name, self.test_model)
+        vrf_url = api.build_model_url("ipam", "vrfs")
+        url = self.get_mapper_url(mapper)
+        expected_attr = {
+            "count": 5, "next": None, "previous": None,
+            "results": [
+                {
+                    "id": i, "name": "test{}".format(i),
+                    "vrf": {"id": i, "url": vrf_url + "{}/".format(i)}
+                } for i in range(5)
+            ]
+        }
+        with requests_mock.Mocker() as m:
+            m.register_uri("get", url, json=expected_attr)
+            vrf_req = m.register_uri(
+                "get", vrf_url, json={
+                    "count": 5, "next": None, "previous": None,
+                    "results": [
+                        {"id": i, "name": "vrf{}".format(i)} for i in range(5)
+                    ]
+                }
+            )
+            child_mappers = list(mapper.get(prefetch=["vrf"]))
+
+        assert vrf_req.call_count == 1
+        # request mocker is down, so any new request will fail
+        for i, child_mapper in enumerate(child_mappers):
+            assert child_mapper.vrf.name == "vrf{}".format(i)
+
     def _get_child_mapper_variable_attr(self, mapper, expected_attr):
         """
         Get child mapper with expected_attr as parameter
@@ -229,7 +677,7 @@ class TestNetboxMapper():
             received_req = m.register_uri(
                 "post", url, json=self.update_or_create_resource_json_callback
             )
-            m.register_uri(
+            get_req = m.register_uri(
                 "get", url + "1/",
                 json={
                     "count": 1, "next": None, "previous": None,
@@ -238,8 +686,33 @@ class TestNetboxMapper():
             )
             child_mapper = mapper.post(name="testname")
 
+        assert not get_req.called
         assert child_mapper.id == 1
         assert child_mapper.name == "testname"
+        assert child_mapper.get_changes() == {}
+
+    def test_post_refetch(self):
+        mapper = NetboxMapper(
+            self.api, self.test_app_name, self.test_model,
+            refetch_after_post=True
+        )
+        url = self.get_mapper_url(mapper)
+
+        with requests_mock.Mocker() as m:
+            m.register_uri(
+                "post", url, json=self.update_or_create_resource_json_callback
+            )
+            get_req = m.register_uri(
+                "get", url + "1/",
+                json={"id": 1, "name": "testname", "slug": "testname"}
+            )
+            child_mapper = mapper.post(name="testname")
+            assert get_req.call_count == 1
+
+            mapper.post(name="testname", refetch=False)
+            assert get_req.call_count == 1
+
+        assert child_mapper.slug == "testname"
 
     def test_post_with_failing_get(self, mapper):
         url = self.get_mapper_url(mapper)
@@ -252,7 +725,7 @@ class TestNetboxMapper():
                 "get", url + "1/",
                 text="Not Found", status_code=404
             )
-            child_mapper = mapper.post(name="testname")
+            child_mapper = mapper.post(name="testname", refetch=True)
 
         assert isinstance(child_mapper, NetboxPassiveMapper)
         assert child_mapper.id == 1
@@ -324,6 +797,57 @@ class TestNetboxMapper():
         req_json = received_req.last_request.json()
         assert req_json["name"] == child_mapper.name
 
+    def test_save(self, mapper):
+        child_mapper = self.get_child_mapper_foreign_key(mapper)
+        url = self.get_mapper_url(child_mapper) + "{}/".format(child_mapper.id)
+        with requests_mock.Mocker() as m:
+            received_req = m.register_uri(
+                "patch", url, json=self.update_or_create_resource_json_callback
+            )
+            child_mapper.name = "another testname"
+            child_mapper.vrf = 2
+            child_mapper.save()
+
+            assert received_req.last_request.json() == {
+                "name": "another testname", "vrf": 2
+            }
+            assert child_mapper.get_changes() == {}
+
+    def test_save_without_changes(self, mapper):
+        child_mapper = self.get_child_mapper_with_choice(mapper)
+        with requests_mock.Mocker() as m:
+            assert child_mapper.save() is None
+
+        assert m.call_count == 0
+
+    def test_get_changes_mutable_attribute(self, mapper):
+        child_mapper = self._get_child_mapper_variable_attr(
+            mapper, {"id": 1, "tags": ["foo"]}
+        )
+        child_mapper.tags.append("bar")
+
+        assert child_mapper.get_changes() == {"tags": ["foo", "bar"]}
+
+    def test_build_mapper_without_serializing(self, mapper, mocker):
+        """
+        Building a mapper must stay cheap: its upstream state is computed
+        from the received attributes, without serializing or deep copying
+        the mapper
+        """
+        deepcopy = mocker.patch("netboxapi.mapper.copy.deepcopy")
+        to_dict = mocker.spy(NetboxMapper, "to_dict")
+        child_mapper = mapper._build_new_mapper_from({
+            "id": 1, "name": "test", "created": "2020-01-01",
+            "status": {"value": "active", "label": "Active"},
+            "vrf": {"id": 2, "url": "vrf_url"},
+            "tags": [{"id": 3, "name": "tag"}], "custom_fields": {},
+        }, mapper._route + "1/")
+
+        assert not deepcopy.called
+        assert not to_dict.called
+        assert child_mapper.__upstream_state__ == child_mapper.to_dict()
+        assert child_mapper.get_changes() == {}
+
     def get_child_mapper(self, mapper):
         expected_attr = {
             "count": 1, "next": None, "previous": None,
@@ -450,6 +974,82 @@ class TestNetboxMapper():
         }
         return self._get_child_mapper_variable_attr(mapper, expected_attr)
 
+    def test_bulk_create(self, mapper):
+        url = self.get_mapper_url(mapper)
+
+        fk_mapper = NetboxMapper(mapper.netbox_api, "foo", "bar")
+        fk_mapper.id = 2
+
+        def bulk_create_callback(request, context):
+            return [
+                dict(obj, id=i) for i, obj in enumerate(request.json(), 1)
+            ]
+
+        with requests_mock.Mocker() as m:
+            received_req = m.register_uri(
+                "post", url, json=bulk_create_callback
+            )
+            child_mappers = mapper.bulk_create(
+                ({"name": "test{}".format(i), "fk": fk_mapper}
+                 for i in range(5)),
+                batch_size=2
+            )
+
+        assert received_req.call_count == 3
+        assert received_req.last_request.json() == [
+            {"name": "test4", "fk": 2}
+        ]
+        assert [m.name for m in child_mappers] == [
+            "test{}".format(i) for i in range(5)
+        ]
+
+    def test_bulk_update(self, mapper):
+        url = self.get_mapper_url(mapper)
+        expected_attr = {
+            "count": 3, "next": None, "previous": None,
+            "results": [
+                {"id": i, "name": "test{}".format(i)} for i in range(1, 4)
+            ]
+        }
+        with requests_mock.Mocker() as m:
+            m.register_uri("get", url, json=expected_attr)
+            child_mappers = list(mapper.get())
+
+        for child_mapper in child_mappers:
+            child_mapper.name = "another {}".format(child_mapper.name)
+
+        with requests_mock.Mocker() as m:
+            received_req = m.register_uri(
+                "patch", url, json=lambda request, context: request.json()
+            )
+            updated = mapper.bulk_update(child_mappers, batch_size=2)
+
+        assert received_req.call_count == 2
+        assert [u["name"] for u in updated] == [
+            "another test{}".format(i) for i in range(1, 4)
+        ]
+        # a following save() has nothing to send
+        assert all(not m.get_changes() for m in child_mappers)
+
+    def test_bulk_delete(self, mapper):
+        url = self.get_mapper_url(mapper)
+        child_mapper = self.get_child_mapper(mapper)
+
+        with requests_mock.Mocker() as m:
+            received_req = m.register_uri("delete", url, status_code=204)
+            mapper.bulk_delete([child_mapper, 2, 3], batch_size=2)
+
+        assert received_req.call_count == 2
+        assert received_req.request_history[0].json() == [
+            {"id": 1}, {"id": 2}
+        ]
+
+    def test_bulk_from_child(self, mapper):
+        child_mapper = self.get_child_mapper(mapper)
+
+        with pytest.raises(ForbiddenAsChildError):
+            child_mapper.bulk_delete([1])
+
     def test_delete(self, mapper):
         url = self.get_mapper_url(mapper)
         with requests_mock.Mocker() as m:
@@ -0,0 +1,54 @@
+import pytest
+import requests
+import requests_mock
+
+from netboxapi import NetboxAPI
+from netboxapi.metrics import RequestMetrics
+
+
+class TestRequestMetrics():
+    url = "http://localhost/api"
+
+    def test_hooks(self):
+        api = NetboxAPI(self.url)
+        before, after = [], []
+        api.before_request_hooks.append(
+            lambda method, route, kwargs: before.append((method, route))
+        )
+        api.after_request_hooks.append(after.append)
+
+        with requests_mock.Mocker() as m:
+            m.register_uri("get", self.url + "/dcim/sites/", json={"id": 1})
+            api.get("dcim/sites/")
+
+        assert before == [("get", "dcim/sites/")]
+        event, = after
+        assert (event.method, event.route, event.status_code) == (
+            "get", "dcim/sites/", 200
+        )
+        assert event.response_size == len('{"id": 1}')
+        assert event.retries == 0
+        assert event.error is None
+
+    def test_report(self):
+        api = NetboxAPI(self.url)
+        metrics = RequestMetrics()
+        api.after_request_hooks.append(metrics)
+
+        with requests_mock.Mocker() as m:
+            for i in range(1, 4):
+                m.register_uri(
+                    "get", self.url + "/ipam/vrfs/{}/".format(i), json={}
+                )
+                api.get("ipam/vrfs/{}/".format(i))
+            m.register_uri(
+                "delete", self.url + "/ipam/vrfs/4/", status_code=404
+            )
+            with pytest.raises(requests.exceptions.HTTPError):
+                api.delete("ipam/vrfs/4/")
+
+        report = metrics.report()
+        assert report[("get", "ipam/vrfs")]["count"] == 3
+        assert report[("get", "ipam/vrfs")]["bytes"] == 6
+        assert report[("get", "ipam/vrfs")]["p50"] is not None
+        assert report[("delete", "ipam/vrfs")]["errors"] == 1
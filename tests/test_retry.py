@@ -0,0 +1,35 @@
+import email.utils
+import time
+
+from netboxapi.retry import RetryPolicy
+
+
+class TestRetryPolicy():
+    def test_should_retry(self):
+        policy = RetryPolicy(max_attempts=3)
+
+        assert policy.should_retry("get", 1, 503)
+        assert policy.should_retry("GET", 2)
+        assert not policy.should_retry("get", 3, 503)
+        assert not policy.should_retry("get", 1, 400)
+        assert not policy.should_retry("post", 1, 503)
+
+    def test_backoff(self):
+        policy = RetryPolicy(backoff_factor=1, max_backoff=5, jitter=False)
+
+        assert [policy.get_backoff(a) for a in range(1, 5)] == [1, 2, 4, 5]
+
+    def test_backoff_jitter(self):
+        policy = RetryPolicy(backoff_factor=1)
+
+        for _ in range(20):
+            assert 2 <= policy.get_backoff(3) <= 4
+
+    def test_retry_after(self):
+        policy = RetryPolicy(max_backoff=60)
+
+        assert policy.get_backoff(1, "12") == 12
+        assert policy.get_backoff(1, "3600") == 60
+
+        retry_at = email.utils.formatdate(time.time() + 30, usegmt=True)
+        assert 25 < policy.get_backoff(1, retry_at) <= 30
@@ -0,0 +1,74 @@
+import pytest
+
+from netboxapi.exceptions import ValidationError
+from netboxapi.schema import ModelSchema, SchemaCache
+
+
+OPTIONS = {
+    "name": "Device List",
+    "actions": {"POST": {
+        "id": {"type": "integer", "required": False, "read_only": True},
+        "name": {"type": "string", "required": False, "read_only": False},
+        "site": {"type": "field", "required": True, "read_only": False},
+        "status": {
+            "type": "choice", "required": False, "read_only": False,
+            "choices": [
+                {"value": "active", "display_name": "Active"},
+                {"value": "offline", "display_name": "Offline"},
+            ],
+        },
+    }},
+}
+
+
+class TestModelSchema():
+    @pytest.fixture()
+    def schema(self):
+        return ModelSchema(OPTIONS)
+
+    def test_fields(self, schema):
+        assert schema.writable_fields == {"name", "site", "status"}
+        assert schema.required_fields == {"site"}
+
+    def test_choices(self, schema):
+        assert schema.get_label("status", "active") == "Active"
+        assert schema.get_value("status", "Offline") == "offline"
+        with pytest.raises(KeyError):
+            schema.get_label("status", "unknown")
+
+    def test_validate(self, schema):
+        schema.validate({"id": 1, "site": 1, "status": "active"})
+        schema.validate(
+            {"status": {"value": "active", "label": "Active"}}, partial=True
+        )
+
+        with pytest.raises(ValidationError) as e:
+            schema.validate({"status": "unknown", "color": "red"})
+
+        assert e.value.errors == {
+            "status": '"unknown" is not a valid choice.',
+            "color": "Unknown field.",
+            "site": "This field is required.",
+        }
+
+    def test_validate_without_actions(self):
+        ModelSchema({"name": "Device List"}).validate({"color": "red"})
+
+
+class TestSchemaCache():
+    def test_get_set(self):
+        cache = SchemaCache()
+        schema = cache.set("dcim/devices", OPTIONS)
+
+        assert cache.get("dcim/devices") is schema
+        assert cache.get("dcim/sites") is None
+
+    def test_directory(self, tmp_path):
+        SchemaCache(str(tmp_path)).set("dcim/devices", OPTIONS, "4.0.1")
+        cache = SchemaCache(str(tmp_path))
+
+        assert cache.get("dcim/devices", "4.0.1").options == OPTIONS
+        assert cache.get("dcim/devices", "4.1.0") is None
+
+        cache.clear()
+        assert SchemaCache(str(tmp_path)).get("dcim/devices", "4.0.1") is None
@@ -0,0 +1,161 @@
+import pytest
+import requests
+import requests_mock
+
+from netboxapi import NetboxAPI, NetboxMapper
+from netboxapi.exceptions import ReadOnlyAPIError
+from netboxapi.snapshot import NetboxSnapshot
+
+
+class TestNetboxSnapshot():
+    url = "http://localhost/api"
+
+    @pytest.fixture()
+    def snapshot(self, tmp_path):
+        api = NetboxAPI(self.url)
+        return NetboxSnapshot(str(tmp_path / "netbox.sqlite"), api)
+
+    def build_device(self, i, last_updated="2020-01-01T00:00:00Z"):
+        return {
+            "id": i, "name": "device{}".format(i),
+            "status": {"value": "active", "label": "Active"},
+            "enabled": i % 2 == 0,
+            "site": {"id": i % 2, "url": self.url + "/dcim/sites/{}/".format(
+                i % 2
+            )},
+            "last_updated": last_updated,
+        }
+
+    def register_devices(self, m, devices, after_request=None):
+        url = self.url + "/dcim/devices/"
+
+        def callback(request, context):
+            results = sorted(devices, key=lambda d: d["id"])
+            if "brief" in request.qs:
+                results = [{"id": d["id"]} for d in results]
+            if "last_updated__gte" in request.qs:
+                last_updated = request.qs["last_updated__gte"][0].upper()
+                results = [
+                    d for d in results if d["last_updated"] >= last_updated
+                ]
+            if "id__gt" in request.qs:
+                id_gt = int(request.qs["id__gt"][0])
+                results = [d for d in results if d["id"] > id_gt]
+            if request.qs.get("ordering") == ["-last_updated"]:
+                results.sort(key=lambda d: d["last_updated"], reverse=True)
+
+            count = len(results)
+            limit = int(request.qs.get("limit", [1000])[0])
+            results = results[:limit]
+            if after_request:
+                after_request()
+            return {
+                "count": count, "previous": None, "results": results,
+                "next": url + "?next" if count > limit else None,
+            }
+
+        return m.register_uri("get", url, json=callback)
+
+    def test_sync(self, snapshot):
+        devices = [self.build_device(i) for i in range(1, 4)]
+        with requests_mock.Mocker() as m:
+            self.register_devices(m, devices)
+            assert snapshot.sync("dcim", "devices") == 3
+
+        devices[0] = self.build_device(1, "2021-01-01T00:00:00Z")
+        del devices[1]
+        with requests_mock.Mocker() as m:
+            req = self.register_devices(m, devices)
+            # objects updated at the last known date are pulled again
+            assert snapshot.sync("dcim", "devices") == 2
+            assert req.request_history[0].qs["last_updated__gte"] == [
+                "2020-01-01t00:00:00z"
+            ]
+
+        assert snapshot.count("dcim/devices/") == 2
+        assert snapshot.get_last_updated("dcim/devices/") == (
+            "2021-01-01T00:00:00Z"
+        )
+
+    def test_sync_pagination(self, snapshot):
+        devices = [self.build_device(i) for i in range(1, 6)]
+        with requests_mock.Mocker() as m:
+            req = self.register_devices(m, devices)
+            assert snapshot.sync("dcim", "devices", limit=2) == 5
+
+        pages = [r.qs for r in req.request_history if "brief" not in r.qs]
+        assert [p.get("id__gt") for p in pages[1:]] == [None, ["2"], ["4"]]
+        assert all(p["ordering"] == ["id"] for p in pages[1:])
+        assert snapshot.count("dcim/devices/") == 5
+
+    def test_sync_update_during_sync(self, snapshot):
+        devices = [self.build_device(i) for i in range(1, 5)]
+
+        def update_first_device():
+            if len(req.request_history) == 3:
+                devices[0] = self.build_device(1, "2021-01-01T00:00:00Z")
+
+        with requests_mock.Mocker() as m:
+            req = self.register_devices(m, devices, update_first_device)
+            assert snapshot.sync("dcim", "devices", limit=2) == 4
+
+        # the update has been missed, but will be pulled next time
+        assert next(snapshot.iterate_over_objects(
+            "dcim/devices/", ids=[1]
+        ))["last_updated"] == "2020-01-01T00:00:00Z"
+        assert snapshot.get_last_updated("dcim/devices/") == (
+            "2020-01-01T00:00:00Z"
+        )
+        with requests_mock.Mocker() as m:
+            self.register_devices(m, devices)
+            snapshot.sync("dcim", "devices", limit=2)
+
+        assert next(snapshot.iterate_over_objects(
+            "dcim/devices/", ids=[1]
+        ))["last_updated"] == "2021-01-01T00:00:00Z"
+
+    def test_snapshot_api_pagination(self, snapshot):
+        snapshot._store_objects(
+            "dcim/devices/", [self.build_device(i) for i in range(1, 6)]
+        )
+        response = snapshot.get_api().get(
+            "dcim/devices/", params={"limit": 2, "offset": 2, "site": 1}
+        )
+
+        assert response["count"] == 3
+        assert [d["id"] for d in response["results"]] == [5]
+        assert response["next"] is None
+        assert "offset=0" in response["previous"]
+
+    def test_snapshot_api(self, snapshot):
+        devices = [self.build_device(i) for i in range(1, 6)]
+        with requests_mock.Mocker() as m:
+            self.register_devices(m, devices)
+            snapshot.sync("dcim", "devices")
+
+        mapper = NetboxMapper(snapshot.get_api(), "dcim", "devices")
+        # request mocker is down, so any request would fail
+        assert [d.id for d in mapper.get(limit=2)] == [1, 2, 3, 4, 5]
+        assert [d.id for d in mapper.get(site=1, status="active")] == [
+            1, 3, 5
+        ]
+        assert [d.id for d in mapper.get(id=[2, 4])] == [2, 4]
+        assert [d.id for d in mapper.get(limit=1, enabled=True)] == [2, 4]
+        assert [d.id for d in mapper.get(name=["device1", "device5"])] == [
+            1, 5
+        ]
+        assert [d.id for d in mapper.get(limit=2, keyset=True)] == [
+            1, 2, 3, 4, 5
+        ]
+
+        for unsupported_filter in ("site_id", "q", "name__ic"):
+            with pytest.raises(ValueError):
+                next(mapper.get(**{unsupported_filter: "1"}))
+
+        device = next(mapper.get(3))
+        assert device.name == "device3"
+        assert device._site_id == 1
+        with pytest.raises(requests.exceptions.HTTPError):
+            next(mapper.get(10))
+        with pytest.raises(ReadOnlyAPIError):
+            device.put()
@@ -0,0 +1,53 @@
+import json
+import pytest
+
+from netboxapi.stream import JSONStreamDecoder
+
+
+class TestJSONStreamDecoder():
+    def decode(self, text, chunk_size=1):
+        decoder = JSONStreamDecoder()
+        objects = []
+        for i in range(0, len(text), chunk_size):
+            objects.extend(decoder.feed(text[i:i + chunk_size]))
+        objects.extend(decoder.close())
+
+        return objects, decoder.remainder
+
+    @pytest.mark.parametrize("chunk_size", (1, 7, 4096))
+    def test_paginated(self, chunk_size):
+        answer = {
+            "count": 12345, "next": "http://localhost/api/?offset=3",
+            "previous": None, "results": [
+                {"id": i, "name": "test {}".format(i), "tags": [],
+                 "vrf": {"id": 1, "url": "http://localhost/api/ipam/vrfs/1/"}}
+                for i in range(3)
+            ]
+        }
+        objects, remainder = self.decode(
+            json.dumps(answer, indent=2), chunk_size
+        )
+
+        assert objects == answer.pop("results")
+        assert remainder == answer
+
+    def test_list(self):
+        answer = [{"vrf": None, "prefix": "10.0.0.0/24"}, 1, "foo"]
+        objects, remainder = self.decode(json.dumps(answer))
+
+        assert objects == answer
+        assert remainder is None
+
+    def test_object(self):
+        answer = {"id": 1, "name": "test", "results": "not a list"}
+        objects, remainder = self.decode(json.dumps(answer))
+
+        assert objects == [answer]
+        assert remainder is None
+
+    def test_truncated(self):
+        decoder = JSONStreamDecoder()
+        decoder.feed('{"count": 1, "results": [{"id": 1}')
+
+        with pytest.raises(json.JSONDecodeError):
+            decoder.close()